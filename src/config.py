@@ -1,5 +1,6 @@
 import json
 import os
+from logger import LOG  # 导入日志模块
 
 class Config:
     def __init__(self):
@@ -18,6 +19,7 @@ class Config:
             self.subscriptions_file = github_config.get('subscriptions_file')
             self.freq_days = github_config.get('progress_frequency_days', 1)
             self.exec_time = github_config.get('progress_execution_time', "08:00")
+            self.use_batch_api = github_config.get('use_batch_api', False)  # 定时报告是否通过 OpenAI Batch API 生成
 
             # 加载 LLM 相关配置
             llm_config = config.get('llm', {})
@@ -25,6 +27,18 @@ class Config:
             self.openai_model_name = llm_config.get('openai_model_name', 'gpt-4o-mini')
             self.ollama_model_name = llm_config.get('ollama_model_name', 'llama3')
             self.ollama_api_url = llm_config.get('ollama_api_url', 'http://localhost:11434/api/chat')
+            self.request_timeout = llm_config.get('request_timeout', 60.0)  # 单次 LLM 请求的超时时间，单位：秒
+            self.max_retries = llm_config.get('max_retries', 2)  # LLM 请求超时或连接失败时的最大重试次数
+            self.max_concurrent_llm_calls = llm_config.get('max_concurrent_calls', 16)  # 同时进行的异步 LLM 请求上限
+            self.max_prompt_tokens = llm_config.get('max_prompt_tokens')  # OpenAI 提示的 token 上限，未设置时按模型的上下文窗口确定，0 表示不检查
+            self.batch_state_file = llm_config.get('batch_state_file', 'batch_jobs.json')  # 未完成的批量任务记录文件
+            self.llm_cache_dir = llm_config.get('cache_dir', '.llm_cache')  # LLM 报告缓存目录
+            self.llm_cache_ttl = llm_config.get('cache_ttl', 86400)  # LLM 报告缓存有效期，单位：秒，0 表示不缓存
+
+            if self.use_batch_api and self.llm_model_type != 'openai':
+                # Batch API 只支持 OpenAI，使用其他模型时守护进程无法提交或取回批量任务
+                LOG.warning(f"Batch API 仅支持 OpenAI 模型，当前模型类型为 {self.llm_model_type}，已关闭 use_batch_api")
+                self.use_batch_api = False
             
             # 加载报告类型配置
             self.report_types = config.get('report_types', ["github", "hacker_news"])  # 默认报告类型
@@ -20,19 +20,36 @@ def graceful_shutdown(signum, frame):
     LOG.info("[优雅退出]守护进程接收到终止信号")
     sys.exit(0)  # 安全退出程序
 
-def github_job(subscription_manager, github_client, report_generator, notifier, days):
+def github_job(subscription_manager, github_client, report_generator, notifier, days, use_batch_api=False):
     LOG.info("[开始执行定时任务]GitHub Repo 项目进展报告")
     subscriptions = subscription_manager.list_subscriptions()  # 获取当前所有订阅
     LOG.info(f"订阅列表：{subscriptions}")
+    markdown_file_paths = {}
+    if use_batch_api:
+        # 通过 Batch API 提交所有订阅的报告，结果由 github_batch_poll_job 取回并发送通知
+        markdown_file_paths = {repo: github_client.export_progress_by_date_range(repo, days) for repo in subscriptions}
+        try:
+            batch_id = report_generator.submit_github_report_batch(markdown_file_paths)
+            LOG.info(f"[定时任务执行完毕]已提交批量任务 {batch_id}")
+            return
+        except Exception as e:
+            # 提交失败时改为实时生成，避免异常导致守护进程退出、当天报告丢失
+            LOG.error(f"提交批量任务失败，改为实时生成报告：{e}")
     for repo in subscriptions:
         # 遍历每个订阅的仓库，执行以下操作
-        markdown_file_path = github_client.export_progress_by_date_range(repo, days)
+        markdown_file_path = markdown_file_paths.get(repo) or github_client.export_progress_by_date_range(repo, days)
         # 从Markdown文件自动生成进展简报
         report, _ = report_generator.generate_github_report(markdown_file_path)
         notifier.notify_github_report(repo, report)
     LOG.info(f"[定时任务执行完毕]")
 
 
+def github_batch_poll_job(report_generator, notifier):
+    LOG.debug("[开始执行定时任务]检查 GitHub 报告批量任务")
+    for repo, report, _ in report_generator.collect_github_report_batches():
+        notifier.notify_github_report(repo, report)
+
+
 def hn_topic_job(hacker_news_client, report_generator):
     LOG.info("[开始执行定时任务]Hacker News 热点话题跟踪")
     markdown_file_path = hacker_news_client.export_top_stories()
@@ -61,7 +78,7 @@ def main():
     hacker_news_client = HackerNewsClient() # 创建 Hacker News 客户端实例
     notifier = Notifier(config.email)  # 创建通知器实例
     llm = LLM(config)  # 创建语言模型实例
-    report_generator = ReportGenerator(llm, config.report_types)  # 创建报告生成器实例
+    report_generator = ReportGenerator(llm, config.report_types, config.batch_state_file)  # 创建报告生成器实例
     subscription_manager = SubscriptionManager(config.subscriptions_file)  # 创建订阅管理器实例
 
     # 启动时立即执行（如不需要可注释）
@@ -71,7 +88,11 @@ def main():
     # 安排 GitHub 的定时任务
     schedule.every(config.freq_days).days.at(
         config.exec_time
-    ).do(github_job, subscription_manager, github_client, report_generator, notifier, config.freq_days)
+    ).do(github_job, subscription_manager, github_client, report_generator, notifier, config.freq_days, config.use_batch_api)
+
+    # 使用 Batch API 时，每10分钟检查一次批量任务是否完成
+    if config.use_batch_api:
+        schedule.every(10).minutes.do(github_batch_poll_job, report_generator, notifier)
     
     # 安排 hn_topic_job 每4小时执行一次，从0点开始
     schedule.every(4).hours.at(":00").do(hn_topic_job, hacker_news_client, report_generator)
@@ -3,12 +3,45 @@
 import requests  # 导入requests库用于HTTP请求
 from datetime import datetime, date, timedelta  # 导入日期处理模块
 import os  # 导入os模块用于文件和目录操作
+import threading  # 导入threading库用于保护跨线程访问的缓存
+from cachetools import LRUCache  # 导入有容量上限的缓存
 from logger import LOG  # 导入日志模块
 
 class GitHubClient:
     def __init__(self, token):
         self.token = token  # GitHub API令牌
         self.headers = {'Authorization': f'token {self.token}'}  # 设置HTTP头部认证信息
+        # 按请求缓存 ETag 和响应数据，用于条件请求；since/until 每天变化，限制容量避免长期运行时内存持续增长
+        self.etag_cache = LRUCache(maxsize=256)
+        self.etag_cache_lock = threading.Lock()  # LRUCache 不是线程安全的，导出在多个线程中并发执行，访问缓存时需要加锁
+
+    def _conditional_headers(self, url, params):
+        # 如果之前请求过相同的 URL 和参数，带上 If-None-Match 头，未变化时 GitHub 返回 304
+        headers = dict(self.headers)
+        with self.etag_cache_lock:
+            cached = self.etag_cache.get(self._etag_key(url, params))
+        if cached:
+            headers['If-None-Match'] = cached[0]
+        return headers
+
+    def _cached_json(self, url, params, response):
+        # 304 表示数据未变化，直接返回缓存的数据；否则记录新的 ETag 和数据
+        key = self._etag_key(url, params)
+        if response.status_code == 304:
+            with self.etag_cache_lock:
+                cached = self.etag_cache.get(key)
+            if cached:
+                LOG.debug(f"{url} 数据未变化，使用缓存")
+                return cached[1]
+        data = response.json()
+        etag = response.headers.get('ETag')
+        if etag:
+            with self.etag_cache_lock:
+                self.etag_cache[key] = (etag, data)
+        return data
+
+    def _etag_key(self, url, params):
+        return url, tuple(sorted(params.items()))
 
     def fetch_updates(self, repo, since=None, until=None):
         # 获取指定仓库的更新，可以指定开始和结束日期
@@ -29,9 +62,9 @@ class GitHubClient:
             params['until'] = until  # 如果指定了结束日期，添加到参数中
 
         try:
-            response = requests.get(url, headers=self.headers, params=params, timeout=10)
+            response = requests.get(url, headers=self._conditional_headers(url, params), params=params, timeout=10)
             response.raise_for_status()  # 检查请求是否成功
-            return response.json()  # 返回JSON格式的数据
+            return self._cached_json(url, params, response)  # 返回JSON格式的数据
         except Exception as e:
             LOG.error(f"从 {repo} 获取 Commits 失败：{str(e)}")
             LOG.error(f"响应详情：{response.text if 'response' in locals() else '无响应数据可用'}")
@@ -42,9 +75,9 @@ class GitHubClient:
         url = f'https://api.github.com/repos/{repo}/issues'  # 构建获取问题的API URL
         params = {'state': 'closed', 'since': since, 'until': until}
         try:
-            response = requests.get(url, headers=self.headers, params=params, timeout=10)
+            response = requests.get(url, headers=self._conditional_headers(url, params), params=params, timeout=10)
             response.raise_for_status()
-            return response.json()
+            return self._cached_json(url, params, response)
         except Exception as e:
             LOG.error(f"从 {repo} 获取 Issues 失败：{str(e)}")
             LOG.error(f"响应详情：{response.text if 'response' in locals() else '无响应数据可用'}")
@@ -55,9 +88,9 @@ class GitHubClient:
         url = f'https://api.github.com/repos/{repo}/pulls'  # 构建获取拉取请求的API URL
         params = {'state': 'closed', 'since': since, 'until': until}
         try:
-            response = requests.get(url, headers=self.headers, params=params, timeout=10)
+            response = requests.get(url, headers=self._conditional_headers(url, params), params=params, timeout=10)
             response.raise_for_status()  # 确保成功响应
-            return response.json()
+            return self._cached_json(url, params, response)
         except Exception as e:
             LOG.error(f"从 {repo} 获取 Pull Requests 失败：{str(e)}")
             LOG.error(f"响应详情：{response.text if 'response' in locals() else '无响应数据可用'}")
@@ -72,11 +105,14 @@ class GitHubClient:
         os.makedirs(repo_dir, exist_ok=True)  # 确保目录存在
         
         file_path = os.path.join(repo_dir, f'{today}.md')  # 构建文件路径
+        lines = [
+            f"# Daily Progress for {repo} ({today})\n\n",
+            "\n## Issues Closed Today\n",
+        ]
+        for issue in updates['issues']:  # 写入今天关闭的问题
+            lines.append(f"- {issue['title']} #{issue['number']}\n")
         with open(file_path, 'w') as file:
-            file.write(f"# Daily Progress for {repo} ({today})\n\n")
-            file.write("\n## Issues Closed Today\n")
-            for issue in updates['issues']:  # 写入今天关闭的问题
-                file.write(f"- {issue['title']} #{issue['number']}\n")
+            file.write("".join(lines))  # 拼接后一次写入，避免逐行写入
         
         LOG.info(f"[{repo}]项目每日进展文件生成： {file_path}")  # 记录日志
         return file_path
@@ -94,11 +130,14 @@ class GitHubClient:
         date_str = f"{since}_to_{today}"
         file_path = os.path.join(repo_dir, f'{date_str}.md')  # 构建文件路径
         
+        lines = [
+            f"# Progress for {repo} ({since} to {today})\n\n",
+            f"\n## Issues Closed in the Last {days} Days\n",
+        ]
+        for issue in updates['issues']:  # 写入在指定日期内关闭的问题
+            lines.append(f"- {issue['title']} #{issue['number']}\n")
         with open(file_path, 'w') as file:
-            file.write(f"# Progress for {repo} ({since} to {today})\n\n")
-            file.write(f"\n## Issues Closed in the Last {days} Days\n")
-            for issue in updates['issues']:  # 写入在指定日期内关闭的问题
-                file.write(f"- {issue['title']} #{issue['number']}\n")
+            file.write("".join(lines))  # 拼接后一次写入，避免逐行写入
         
         LOG.info(f"[{repo}]项目最新进展文件生成： {file_path}")  # 记录日志
         return file_path
@@ -1,4 +1,18 @@
+import os  # 导入os模块用于检查缓存的文件是否存在
+import copy  # 导入copy模块用于为每个模型复制一份配置
+import asyncio  # 导入asyncio库用于并发生成多个项目的报告
+
+# 在创建任何事件循环之前切换到 uvloop，降低每次 await 的调度开销（uvloop 不支持 Windows，未安装时使用默认事件循环）
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    pass
+
+import threading  # 导入threading库用于保护跨线程访问的缓存
+from datetime import date  # 导入date用于按天区分缓存
 import gradio as gr  # 导入gradio库用于创建GUI
+from cachetools import TTLCache  # 导入带过期时间的缓存
 
 from config import Config  # 导入配置管理模块
 from github_client import GitHubClient  # 导入用于GitHub API操作的客户端
@@ -14,38 +28,102 @@ github_client = GitHubClient(config.github_token)
 hacker_news_client = HackerNewsClient() # 创建 Hacker News 客户端实例
 subscription_manager = SubscriptionManager(config.subscriptions_file)
 
-def generate_github_report(model_type, model_name, repo, days):
-    config.llm_model_type = model_type
+# 按 (模型类型, 模型名称) 缓存报告生成器，各次请求复用同一个 LLM 实例及其连接池
+report_generators = {}
+report_generators_lock = threading.Lock()
+
+def get_report_generator(model_type, model_name):
+    key = (model_type, model_name)
+    with report_generators_lock:
+        if key not in report_generators:
+            # 每个模型使用独立的配置副本，避免并发请求互相修改模型设置
+            llm_config = copy.copy(config)
+            llm_config.llm_model_type = model_type
+            if model_type == "openai":
+                llm_config.openai_model_name = model_name
+            else:
+                llm_config.ollama_model_name = model_name
+
+            llm = LLM(llm_config)  # 创建语言模型实例
+            report_generators[key] = ReportGenerator(llm, config.report_types, config.batch_state_file)  # 创建报告生成器实例
+        return report_generators[key]
+
+# 缓存 GitHub 进展导出结果，短时间内重复点击相同的项目和周期时不再请求 GitHub API
+github_progress_cache = TTLCache(maxsize=256, ttl=600)
+github_progress_cache_lock = threading.Lock()  # 导出在多个线程中并发执行，访问缓存时需要加锁
+
+def export_github_progress(repo, days, refresh=False):
+    # 缓存键包含当天日期，跨天后自动失效
+    key = (repo, days, date.today().isoformat())
+    if not refresh:
+        with github_progress_cache_lock:
+            raw_file_path = github_progress_cache.get(key)
+        if raw_file_path and os.path.exists(raw_file_path):
+            LOG.info(f"[{repo}]使用缓存的项目进展文件： {raw_file_path}")
+            return raw_file_path
 
-    if model_type == "openai":
-        config.openai_model_name = model_name
-    else:
-        config.ollama_model_name = model_name
-
-    llm = LLM(config)  # 创建语言模型实例
-    report_generator = ReportGenerator(llm, config.report_types)  # 创建报告生成器实例
-
-    # 定义一个函数，用于导出和生成指定时间范围内项目的进展报告
     raw_file_path = github_client.export_progress_by_date_range(repo, days)  # 导出原始数据文件路径
-    report, report_file_path = report_generator.generate_github_report(raw_file_path)  # 生成并获取报告内容及文件路径
-
-    return report, report_file_path  # 返回报告内容和报告文件路径
+    with github_progress_cache_lock:
+        github_progress_cache[key] = raw_file_path
+    return raw_file_path
+
+async def generate_github_report(model_type, model_name, repos, days, refresh=False):
+    if not repos:
+        raise gr.Error("请至少选择一个订阅项目")
+    if isinstance(repos, str):
+        repos = [repos]
+
+    # 首次创建 LLM 时可能需要加载 tiktoken 编码，且需要等待锁，放到线程中执行以免阻塞事件循环
+    report_generator = await asyncio.to_thread(get_report_generator, model_type, model_name)
+
+    if len(repos) == 1:
+        # 单个项目时流式输出，生成过程中逐步刷新界面
+        raw_file_path = await asyncio.to_thread(export_github_progress, repos[0], days, refresh)  # 导出原始数据文件路径
+        async for report, report_file_path in report_generator.astream_github_report(raw_file_path):
+            yield report, [report_file_path] if report_file_path else None
+        return
+
+    # 多个项目通过流水线生成报告，GitHub 请求与 LLM 请求重叠进行
+    results = await report_generator.agenerate_github_reports_pipeline(
+        repos, lambda repo: export_github_progress(repo, days, refresh)
+    )
+
+    report = "\n\n---\n\n".join(report for report, _ in results)  # 合并各项目的报告内容
+    report_file_paths = [report_file_path for _, report_file_path in results]
+
+    yield report, report_file_paths  # 返回报告内容和报告文件路径列表
+
+def submit_github_report_batch(model_type, model_name, repos, days, refresh=False):
+    if not config.use_batch_api:
+        # 守护进程只在启用 use_batch_api 时轮询批量任务，否则提交的任务不会被取回
+        raise gr.Error("未启用批量任务，请在配置中设置 use_batch_api")
+    if model_type != "openai":
+        raise gr.Error("批量任务仅支持 OpenAI 模型")
+    if not repos:
+        raise gr.Error("请至少选择一个订阅项目")
+    if isinstance(repos, str):
+        repos = [repos]
+
+    report_generator = get_report_generator(model_type, model_name)
+
+    markdown_file_paths = {repo: export_github_progress(repo, days, refresh) for repo in repos}
+    batch_id = report_generator.submit_github_report_batch(markdown_file_paths)
+
+    # 批量任务在 24 小时内完成，由守护进程取回结果并发送通知
+    return f"已提交批量任务 `{batch_id}`，共 {len(repos)} 个项目。报告生成后将由守护进程通过邮件发送。"
 
 def generate_hn_hour_topic(model_type, model_name):
-    config.llm_model_type = model_type
+    report_generator = get_report_generator(model_type, model_name)
 
-    if model_type == "openai":
-        config.openai_model_name = model_name
-    else:
-        config.ollama_model_name = model_name
+    markdown_file_path = hacker_news_client.export_top_stories()
 
-    llm = LLM(config)  # 创建语言模型实例
-    report_generator = ReportGenerator(llm, config.report_types)  # 创建报告生成器实例
+    # 流式输出，生成过程中逐步刷新界面，最后一次产出报告内容和报告文件路径
+    yield from report_generator.stream_hn_topic_report(markdown_file_path)
 
-    markdown_file_path = hacker_news_client.export_top_stories()
-    report, report_file_path = report_generator.generate_hn_topic_report(markdown_file_path)
 
-    return report, report_file_path  # 返回报告内容和报告文件路径
+# 定义一个回调函数，用于重新读取订阅文件并更新订阅列表的选项
+def refresh_subscription_list():
+    return gr.Dropdown(choices=subscription_manager.list_subscriptions(refresh=True))
 
 
 # 定义一个回调函数，用于根据 Radio 组件的选择返回不同的 Dropdown 选项
@@ -69,23 +147,34 @@ with gr.Blocks(title="GitHubSentinel") as demo:
         model_name = gr.Dropdown(choices=["gpt-4o", "gpt-4o-mini", "gpt-3.5-turbo"], label="选择模型")
 
         # 创建订阅列表的 Dropdown 组件
-        subscription_list = gr.Dropdown(subscription_manager.list_subscriptions(), label="订阅列表", info="已订阅GitHub项目")
+        subscription_list = gr.Dropdown(subscription_manager.list_subscriptions(), multiselect=True, label="订阅列表", info="已订阅GitHub项目，可多选")
+
+        # 创建按钮来刷新订阅列表，订阅文件修改后无需重启服务
+        refresh_subscriptions_button = gr.Button("刷新订阅列表", size="sm")
+        refresh_subscriptions_button.click(fn=refresh_subscription_list, outputs=subscription_list)
 
         # 创建 Slider 组件
         days = gr.Slider(value=2, minimum=1, maximum=7, step=1, label="报告周期", info="生成项目过去一段时间进展，单位：天")
 
+        # 创建 Checkbox 组件，用于跳过缓存
+        refresh = gr.Checkbox(label="强制刷新", info="跳过缓存，重新从 GitHub 获取项目进展")
+
         # 使用 radio 组件的值来更新 dropdown 组件的选项
         model_type.change(fn=update_model_list, inputs=model_type, outputs=model_name)
 
         # 创建按钮来生成报告
         button = gr.Button("生成报告")
 
+        # 创建按钮来提交夜间批量任务，费用更低但不实时返回
+        batch_button = gr.Button("提交夜间批量摘要", variant="secondary", visible=config.use_batch_api)
+
         # 设置输出组件
         markdown_output = gr.Markdown()
-        file_output = gr.File(label="下载报告")
+        file_output = gr.File(label="下载报告", file_count="multiple")
 
         # 将按钮点击事件与导出函数绑定
-        button.click(generate_github_report, inputs=[model_type, model_name, subscription_list, days], outputs=[markdown_output, file_output])
+        button.click(generate_github_report, inputs=[model_type, model_name, subscription_list, days, refresh], outputs=[markdown_output, file_output])
+        batch_button.click(submit_github_report_batch, inputs=[model_type, model_name, subscription_list, days, refresh], outputs=markdown_output)
 
     # 创建 Hacker News 热点话题 Tab
     with gr.Tab("Hacker News 热点话题"):
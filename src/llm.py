@@ -1,7 +1,123 @@
+import re
 import json
-import requests
-from openai import OpenAI  # 导入OpenAI库用于访问GPT模型
+import atexit
+import asyncio
+import functools
+import orjson  # 导入orjson库用于更快地序列化和解析 JSON
+import httpx  # 导入httpx库用于异步HTTP请求
 from logger import LOG  # 导入日志模块
+from report_cache import ReportCache  # 导入报告缓存，相同输入不重复调用模型
+
+# 并发请求共享的连接池上限，HTTP/2 下多个请求复用同一个连接
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+
+# 建立连接的超时时间，单位：秒；读取超时由配置中的 request_timeout 决定
+CONNECT_TIMEOUT = 3
+
+# Ollama 异步请求共用的 HTTP 客户端，首次使用时创建
+ollama_async_client = None
+
+def get_ollama_async_client():
+    """
+    获取进程内共享的 Ollama 异步 HTTP 客户端，避免每次请求重新建立连接。
+    """
+    global ollama_async_client
+    if ollama_async_client is None:
+        ollama_async_client = httpx.AsyncClient(
+            http2=True, limits=HTTP_LIMITS, headers={"Content-Type": "application/json"}
+        )
+    return ollama_async_client
+
+# 进程内共享的 OpenAI 客户端 (同步客户端, 异步客户端)，首次使用时创建
+openai_clients = None
+
+def get_openai_clients():
+    """
+    获取进程内共享的 OpenAI 客户端，所有 LLM 实例复用同一个连接池，不会因重新创建 LLM 而重新握手。
+    """
+    global openai_clients
+    if openai_clients is None:
+        from openai import OpenAI, AsyncOpenAI, DefaultAsyncHttpxClient  # 导入OpenAI库用于访问GPT模型
+
+        # 重试由 _with_retries 统一处理，关闭客户端自带的重试以免重复
+        client = OpenAI(max_retries=0)
+        # 异步客户端启用 HTTP/2 多路复用，并发请求共享同一个 TLS 连接
+        async_client = AsyncOpenAI(
+            max_retries=0,
+            http_client=DefaultAsyncHttpxClient(http2=True, limits=HTTP_LIMITS)
+        )
+        openai_clients = (client, async_client)
+    return openai_clients
+
+@atexit.register
+def close_http_clients():
+    """
+    进程退出时关闭共享的 HTTP 客户端，释放连接池。
+    """
+    if openai_clients is None and ollama_async_client is None:
+        return
+    if openai_clients is not None:
+        openai_clients[0].close()
+
+    async def close_async_clients():
+        if ollama_async_client is not None:
+            await ollama_async_client.aclose()
+        if openai_clients is not None:
+            await openai_clients[1].close()
+
+    try:
+        asyncio.run(close_async_clients())
+    except Exception as e:
+        LOG.debug(f"关闭 HTTP 客户端时发生错误：{e}")
+
+# 多个项目合并到同一个提示中时使用的分隔标记
+MARSHAL_INPUT_SEPARATOR = "===REPO {index}==="
+MARSHAL_OUTPUT_SEPARATOR = "===REPORT {index}==="
+MARSHAL_OUTPUT_PATTERN = re.compile(r"^===REPORT (\d+)===\s*$", re.MULTILINE)
+
+# 常用 OpenAI 模型的上下文窗口大小，提示超过该长度的请求必然失败
+OPENAI_CONTEXT_TOKENS = {
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+    "gpt-4-turbo": 128000,
+    "gpt-4-1106": 128000,
+    "gpt-4-0125": 128000,
+    "gpt-4": 8192,
+    "gpt-3.5-turbo": 16385,
+}
+
+def get_max_prompt_tokens(model_name):
+    """
+    按最长前缀匹配模型名称（如 gpt-4o-2024-08-06 对应 gpt-4o），返回提示的 token 上限，未知模型返回 None。
+    """
+    for prefix in sorted(OPENAI_CONTEXT_TOKENS, key=len, reverse=True):
+        if model_name.startswith(prefix):
+            return OPENAI_CONTEXT_TOKENS[prefix]
+    return None
+
+@functools.lru_cache(maxsize=None)
+def get_token_encoding(model_name):
+    """
+    获取模型对应的 tiktoken 编码，每个模型只加载一次。未知模型使用 o200k_base 编码。
+    tiktoken 首次使用需要下载编码文件，失败时返回 None 并同样缓存，不会在每次请求时重新下载。
+    """
+    try:
+        import tiktoken  # 仅在需要统计 token 时导入
+        try:
+            return tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        LOG.warning(f"无法加载 {model_name} 的 tiktoken 编码，跳过提示长度检查：{e}")
+        return None
+
+@functools.lru_cache(maxsize=64)
+def count_tokens(text, model_name):
+    """
+    统计文本的 token 数量。系统提示在每次请求中都相同，缓存后只需编码一次。
+    特殊 token（如 <|endoftext|>）按普通文本统计，项目内容中出现这些字符串时不会报错。
+    """
+    return len(get_token_encoding(model_name).encode_ordinary(text))
 
 class LLM:
     def __init__(self, config):
@@ -12,13 +128,42 @@ class LLM:
         """
         self.config = config
         self.model = config.llm_model_type.lower()  # 获取模型类型并转换为小写
+        self.token_encoding = None  # 统计提示 token 数使用的编码，只有 OpenAI 模型需要
+        # openai 和 requests 只在使用对应模型时导入，减少启动时加载的依赖
         if self.model == "openai":
-            self.client = OpenAI()  # 创建OpenAI客户端实例
+            from openai import APITimeoutError, APIConnectionError
+
+            self.client, self.async_client = get_openai_clients()  # 使用共享的OpenAI客户端实例
+            # 提示的 token 上限：配置中指定时使用配置值，否则按模型的上下文窗口确定
+            self.max_prompt_tokens = config.max_prompt_tokens
+            if self.max_prompt_tokens is None:
+                self.max_prompt_tokens = get_max_prompt_tokens(config.openai_model_name)
+            # 编码在初始化时加载一次，不需要检查或加载失败时为 None
+            self.token_encoding = get_token_encoding(config.openai_model_name) if self.max_prompt_tokens else None
+            # 超时或连接失败时可以重试的异常
+            self.retryable_errors = (APITimeoutError, APIConnectionError)
         elif self.model == "ollama":
+            import requests  # 导入requests库用于同步HTTP请求
+            from requests.adapters import HTTPAdapter
+
             self.api_url = config.ollama_api_url  # 设置Ollama API的URL
+            # 复用同一个会话的连接池，避免每次请求重新建立 TCP 连接
+            self.session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20)
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
+            self.session.headers.update({"Connection": "keep-alive", "Content-Type": "application/json"})
+            # 超时或连接失败时可以重试的异常
+            self.retryable_errors = (
+                requests.Timeout, requests.ConnectionError,
+                httpx.TimeoutException, httpx.TransportError,
+            )
         else:
             LOG.error(f"不支持的模型类型: {self.model}")
             raise ValueError(f"不支持的模型类型: {self.model}")  # 如果模型类型不支持，抛出错误
+        self.cache = ReportCache(config.llm_cache_dir, config.llm_cache_ttl)
+        # 限制同时进行的异步请求数量，避免并发过高触发服务端的速率限制
+        self.semaphore = asyncio.Semaphore(config.max_concurrent_llm_calls)
 
     def generate_report(self, system_prompt, user_content):
         """
@@ -28,19 +173,345 @@ class LLM:
         :param user_content: 用户提供的内容，通常是Markdown格式的文本。
         :return: 生成的报告内容。
         """
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_content},
-        ]
+        cache_key = self._cache_key(system_prompt, user_content)
+        report = self.cache.get(cache_key)
+        if report is not None:
+            return report
+
+        self._check_prompt_length(system_prompt, user_content)
+        messages = self._build_messages(system_prompt, user_content)
 
         # 根据选择的模型调用相应的生成报告方法
         if self.model == "openai":
-            return self._generate_report_openai(messages)
+            report = self._with_retries(self._generate_report_openai, messages)
         elif self.model == "ollama":
-            return self._generate_report_ollama(messages)
+            report = self._with_retries(self._generate_report_ollama, messages)
         else:
             raise ValueError(f"不支持的模型类型: {self.model}")
 
+        self.cache.set(cache_key, report)
+        return report
+
+    async def agenerate_report(self, system_prompt, user_content):
+        """
+        异步生成报告，参数与 generate_report 相同，等待网络响应时不会阻塞事件循环。
+
+        :param system_prompt: 系统提示信息，包含上下文和规则。
+        :param user_content: 用户提供的内容，通常是Markdown格式的文本。
+        :return: 生成的报告内容。
+        """
+        cache_key = self._cache_key(system_prompt, user_content)
+        report = self.cache.get(cache_key)
+        if report is not None:
+            return report
+
+        if self.token_encoding is not None:
+            # 统计 token 较耗 CPU，放到线程中执行以免阻塞事件循环
+            await asyncio.to_thread(self._check_prompt_length, system_prompt, user_content)
+        messages = self._build_messages(system_prompt, user_content)
+
+        if self.model == "openai":
+            report = await self._awith_retries(self._agenerate_report_openai, messages)
+        elif self.model == "ollama":
+            report = await self._awith_retries(self._agenerate_report_ollama, messages)
+        else:
+            raise ValueError(f"不支持的模型类型: {self.model}")
+
+        self.cache.set(cache_key, report)
+        return report
+
+    def stream_report(self, system_prompt, user_content):
+        """
+        以流式方式生成报告，astream_report 的同步版本，供同步调用方逐步展示报告。
+
+        :param system_prompt: 系统提示信息，包含上下文和规则。
+        :param user_content: 用户提供的内容，通常是Markdown格式的文本。
+        :return: 生成器，依次产出报告内容片段。
+        """
+        cache_key = self._cache_key(system_prompt, user_content)
+        report = self.cache.get(cache_key)
+        if report is not None:
+            yield report
+            return
+
+        self._check_prompt_length(system_prompt, user_content)
+        messages = self._build_messages(system_prompt, user_content)
+
+        if self.model == "openai":
+            stream = self._stream_report_openai(messages)
+        elif self.model == "ollama":
+            stream = self._stream_report_ollama(messages)
+        else:
+            raise ValueError(f"不支持的模型类型: {self.model}")
+
+        chunks = []
+        for chunk in stream:
+            chunks.append(chunk)
+            yield chunk
+
+        # 流式输出完整结束后才写入缓存，避免缓存不完整或空的报告
+        self.cache.set(cache_key, self._ensure_report("".join(chunks)))
+
+    async def astream_report(self, system_prompt, user_content):
+        """
+        以流式方式异步生成报告，模型每返回一段内容就立即产出，便于界面逐步展示。
+
+        :param system_prompt: 系统提示信息，包含上下文和规则。
+        :param user_content: 用户提供的内容，通常是Markdown格式的文本。
+        :return: 异步生成器，依次产出报告内容片段。
+        """
+        cache_key = self._cache_key(system_prompt, user_content)
+        report = self.cache.get(cache_key)
+        if report is not None:
+            yield report
+            return
+
+        if self.token_encoding is not None:
+            # 统计 token 较耗 CPU，放到线程中执行以免阻塞事件循环
+            await asyncio.to_thread(self._check_prompt_length, system_prompt, user_content)
+        messages = self._build_messages(system_prompt, user_content)
+
+        if self.model == "openai":
+            stream = self._astream_report_openai(messages)
+        elif self.model == "ollama":
+            stream = self._astream_report_ollama(messages)
+        else:
+            raise ValueError(f"不支持的模型类型: {self.model}")
+
+        chunks = []
+        async with self.semaphore:
+            async for chunk in stream:
+                chunks.append(chunk)
+                yield chunk
+
+        # 流式输出完整结束后才写入缓存，避免缓存不完整或空的报告
+        self.cache.set(cache_key, self._ensure_report("".join(chunks)))
+
+    async def generate_reports_batch(self, pairs):
+        """
+        并发生成多份报告，总耗时约等于其中最慢的一次请求。
+
+        :param pairs: (system_prompt, user_content) 元组列表。
+        :return: 与输入顺序一致的报告内容列表。
+        """
+        return await asyncio.gather(*[self.agenerate_report(sp, uc) for sp, uc in pairs])
+
+    async def generate_reports_marshaled(self, system_prompt, contents, batch_size=5):
+        """
+        将多个项目的内容合并到同一个提示中生成报告，摊薄系统提示和网络往返的开销。
+
+        每 batch_size 个内容合并成一次请求，各批次之间并发执行。
+        模型未按格式返回的报告会退回到单独请求重新生成。
+
+        :param system_prompt: 系统提示信息，所有内容共用。
+        :param contents: 用户内容列表，每项对应一个项目。
+        :param batch_size: 每次请求合并的内容数量。
+        :return: 与输入顺序一致的报告内容列表。
+        """
+        batches = [contents[i:i + batch_size] for i in range(0, len(contents), batch_size)]
+        results = await asyncio.gather(*[self._generate_marshaled_batch(system_prompt, batch) for batch in batches])
+        return [report for batch_reports in results for report in batch_reports]
+
+    async def _generate_marshaled_batch(self, system_prompt, contents):
+        """
+        为一批内容发起一次合并请求，并按分隔标记拆分出每份报告。
+        """
+        if len(contents) == 1:
+            return [await self.agenerate_report(system_prompt, contents[0])]
+
+        response = await self.agenerate_report(system_prompt, self._marshal_contents(contents))
+        reports = self._unmarshal_reports(response, len(contents))
+
+        missing = [i for i, report in enumerate(reports) if not report]
+        if missing:
+            LOG.warning(f"合并生成的响应中缺少 {len(missing)} 份报告，改为单独生成。")
+            retried = await asyncio.gather(*[self.agenerate_report(system_prompt, contents[i]) for i in missing])
+            for i, report in zip(missing, retried):
+                reports[i] = report
+        return reports
+
+    def _marshal_contents(self, contents):
+        """
+        将多个内容用分隔标记拼接为一条用户消息，并说明输出格式。
+        """
+        separators = "、".join(MARSHAL_OUTPUT_SEPARATOR.format(index=i) for i in range(1, len(contents) + 1))
+        parts = [
+            f"下面包含 {len(contents)} 个项目的内容，每个项目以 {MARSHAL_INPUT_SEPARATOR.format(index='N')} 开头。"
+            f"请为每个项目分别生成一份报告，每份报告单独一行以对应的 {MARSHAL_OUTPUT_SEPARATOR.format(index='N')} 开头，"
+            f"依次为：{separators}。不要输出其他内容。"
+        ]
+        for i, content in enumerate(contents, start=1):
+            parts.append(f"\n{MARSHAL_INPUT_SEPARATOR.format(index=i)}\n{content}")
+        return "\n".join(parts)
+
+    def _unmarshal_reports(self, response, count):
+        """
+        按分隔标记拆分合并生成的响应。
+
+        :param response: 模型返回的完整内容。
+        :param count: 期望的报告数量。
+        :return: 长度为 count 的报告列表，缺失的报告为 None。
+        """
+        reports = [None] * count
+        matches = list(MARSHAL_OUTPUT_PATTERN.finditer(response))
+        for match, next_match in zip(matches, matches[1:] + [None]):
+            index = int(match.group(1)) - 1
+            end = next_match.start() if next_match else len(response)
+            report = response[match.end():end].strip()
+            if 0 <= index < count and report:
+                reports[index] = report
+        return reports
+
+    def submit_report_batch(self, system_prompt, jobs):
+        """
+        通过 OpenAI Batch API 提交一批报告生成请求。批量请求在 24 小时内完成，费用约为实时请求的一半，
+        适合不要求实时返回的定时报告。
+
+        :param system_prompt: 系统提示信息，所有请求共用。
+        :param jobs: {custom_id: user_content} 字典，custom_id 用于在结果中对应每个请求。
+        :return: OpenAI 返回的批量任务 ID。
+        """
+        if self.model != "openai":
+            raise ValueError(f"模型类型 {self.model} 不支持 Batch API")
+
+        lines = []
+        for custom_id, user_content in jobs.items():
+            self._check_prompt_length(system_prompt, user_content)
+            lines.append(json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.config.openai_model_name,
+                    "messages": self._build_messages(system_prompt, user_content),
+                },
+            }, ensure_ascii=False))
+
+        batch_input = self.client.files.create(
+            file=("batch_input.jsonl", "\n".join(lines).encode("utf-8")),
+            purpose="batch"
+        )
+        batch = self.client.batches.create(
+            input_file_id=batch_input.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        LOG.info(f"已提交 OpenAI 批量任务 {batch.id}，共 {len(lines)} 个请求。")
+        return batch.id
+
+    def retrieve_report_batch(self, batch_id):
+        """
+        查询 OpenAI 批量任务，任务完成后下载并解析结果。
+
+        :param batch_id: submit_report_batch 返回的批量任务 ID。
+        :return: 任务完成时返回 {custom_id: report} 字典，尚未完成时返回 None。
+        """
+        batch = self.client.batches.retrieve(batch_id)
+        if batch.status in ("failed", "expired", "cancelled"):
+            LOG.error(f"OpenAI 批量任务 {batch_id} 状态异常：{batch.status}")
+            raise RuntimeError(f"OpenAI 批量任务 {batch_id} 未完成，状态：{batch.status}")
+        if batch.status != "completed":
+            LOG.debug(f"OpenAI 批量任务 {batch_id} 尚未完成，当前状态：{batch.status}")
+            return None
+
+        reports = {}
+        if batch.error_file_id:
+            errors = self.client.files.content(batch.error_file_id).text
+            LOG.error(f"批量任务 {batch_id} 中有请求失败：{errors}")
+        if batch.output_file_id is None:
+            # 所有请求都失败时不会生成结果文件
+            return reports
+
+        output = self.client.files.content(batch.output_file_id).text
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            result = json.loads(line)
+            response = result.get("response") or {}
+            if result.get("error") or response.get("status_code") != 200:
+                LOG.error(f"批量任务 {batch_id} 中的请求 {result.get('custom_id')} 失败：{result.get('error') or response}")
+                continue
+            reports[result["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+        return reports
+
+    def _ensure_report(self, report):
+        """
+        检查模型返回的报告内容，内容为空时报错，避免把空报告返回给调用方或写入缓存。
+        """
+        if not report:
+            message = "Ollama API 返回的响应结构无效" if self.model == "ollama" else "OpenAI API 返回的报告内容为空"
+            LOG.error(f"生成报告时发生错误：{message}")
+            raise ValueError(message)
+        return report
+
+    def _check_prompt_length(self, system_prompt, user_content):
+        """
+        在发送请求前估算 OpenAI 提示的 token 数，超过 max_prompt_tokens 时直接报错，
+        避免一次注定失败的网络往返。使用 Ollama、未知模型、max_prompt_tokens 为 0 或编码加载失败时不检查。
+        """
+        if self.token_encoding is None:
+            return
+
+        model_name = self.config.openai_model_name
+        prompt_tokens = count_tokens(system_prompt, model_name) + count_tokens(user_content, model_name)
+        if prompt_tokens > self.max_prompt_tokens:
+            LOG.error(f"提示长度 {prompt_tokens} tokens 超过上限 {self.max_prompt_tokens}")
+            raise ValueError(f"提示长度 {prompt_tokens} tokens 超过上限 {self.max_prompt_tokens}")
+
+    def _with_retries(self, generate, messages):
+        """
+        调用生成报告的方法，超时或连接失败时重试，最多重试 config.max_retries 次。
+        """
+        for attempt in range(self.config.max_retries + 1):
+            try:
+                return generate(messages)
+            except self.retryable_errors as e:
+                if attempt == self.config.max_retries:
+                    raise
+                LOG.warning(f"请求超时或连接失败，进行第 {attempt + 1} 次重试：{e}")
+
+    async def _awith_retries(self, agenerate, messages):
+        """
+        _with_retries 的异步版本，同时限制并发请求数量。
+        超时与同步版本一致，由 httpx 的读取超时控制，长时间生成的报告只要持续有数据返回就不会被中断。
+        """
+        for attempt in range(self.config.max_retries + 1):
+            try:
+                async with self.semaphore:
+                    return await agenerate(messages)
+            except self.retryable_errors as e:
+                if attempt == self.config.max_retries:
+                    raise
+                LOG.warning(f"请求超时或连接失败，进行第 {attempt + 1} 次重试：{e!r}")
+
+    def _request_timeout(self):
+        """
+        返回 requests 使用的 (连接超时, 读取超时)。
+        """
+        return CONNECT_TIMEOUT, self.config.request_timeout
+
+    def _httpx_timeout(self):
+        """
+        返回 httpx 使用的超时配置。
+        """
+        return httpx.Timeout(self.config.request_timeout, connect=CONNECT_TIMEOUT)
+
+    def _cache_key(self, system_prompt, user_content):
+        """
+        计算报告缓存键，包含模型类型和名称，切换模型后不会命中其他模型的结果。
+        """
+        model_name = self.config.openai_model_name if self.model == "openai" else self.config.ollama_model_name
+        return self.cache.make_key(system_prompt, user_content, f"{self.model}:{model_name}")
+
+    def _build_messages(self, system_prompt, user_content):
+        """
+        构建包含系统提示和用户内容的消息列表。
+        """
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_content},
+        ]
+
     def _generate_report_openai(self, messages):
         """
         使用 OpenAI GPT 模型生成报告。
@@ -52,7 +523,8 @@ class LLM:
         try:
             response = self.client.chat.completions.create(
                 model=self.config.openai_model_name,  # 使用配置中的OpenAI模型名称
-                messages=messages
+                messages=messages,
+                timeout=self._httpx_timeout()
             )
             LOG.debug("GPT 响应: {}", response)
             return response.choices[0].message.content  # 返回生成的报告内容
@@ -62,38 +534,165 @@ class LLM:
 
     def _generate_report_ollama(self, messages):
         """
-        使用 Ollama LLaMA 模型生成报告。
+        使用 Ollama LLaMA 模型生成报告。以流式方式接收响应，Ollama 无需先在服务端缓存整份报告。
 
         :param messages: 包含系统提示和用户内容的消息列表。
         :return: 生成的报告内容。
         """
-        LOG.info(f"使用 Ollama {self.config.ollama_model_name} 模型生成报告。")
+        report = "".join(self._stream_report_ollama(messages))
+        return self._ensure_report(report)
+
+    def _stream_report_openai(self, messages):
+        """
+        使用 OpenAI GPT 模型流式生成报告。
+
+        :param messages: 包含系统提示和用户内容的消息列表。
+        :return: 生成器，依次产出报告内容片段。
+        """
+        LOG.info(f"使用 OpenAI {self.config.openai_model_name} 模型流式生成报告。")
+        try:
+            stream = self.client.chat.completions.create(
+                model=self.config.openai_model_name,
+                messages=messages,
+                stream=True,
+                timeout=self._httpx_timeout()
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            LOG.error(f"生成报告时发生错误：{e}")
+            raise
+
+    def _stream_report_ollama(self, messages):
+        """
+        使用 Ollama LLaMA 模型流式生成报告，Ollama 以每行一个 JSON 对象的形式返回内容。
+
+        :param messages: 包含系统提示和用户内容的消息列表。
+        :return: 生成器，依次产出报告内容片段。
+        """
+        LOG.info(f"使用 Ollama {self.config.ollama_model_name} 模型流式生成报告。")
         try:
             payload = {
                 "model": self.config.ollama_model_name,  # 使用配置中的Ollama模型名称
                 "messages": messages,
                 "max_tokens": 4000,
                 "temperature": 0.7,
-                "stream": False
+                "stream": True
             }
 
-            response = requests.post(self.api_url, json=payload)  # 发送POST请求到Ollama API
-            response_data = response.json()
+            # 发送POST请求到Ollama API，逐行读取响应
+            with self.session.post(self.api_url, data=orjson.dumps(payload), timeout=self._request_timeout(), stream=True) as response:
+                response.raise_for_status()  # 非 2xx 响应（如模型不存在）直接报错，而不是返回空报告
+                for line in response.iter_lines():
+                    content, done = self._parse_ollama_chunk(line)
+                    if content:
+                        yield content
+                    if done:
+                        break
+        except Exception as e:
+            LOG.error(f"生成报告时发生错误：{e}")
+            raise
+
+    async def _agenerate_report_openai(self, messages):
+        """
+        使用 OpenAI GPT 模型异步生成报告。
+
+        :param messages: 包含系统提示和用户内容的消息列表。
+        :return: 生成的报告内容。
+        """
+        LOG.info(f"使用 OpenAI {self.config.openai_model_name} 模型异步生成报告。")
+        try:
+            response = await self.async_client.chat.completions.create(
+                model=self.config.openai_model_name,
+                messages=messages,
+                timeout=self._httpx_timeout()
+            )
+            LOG.debug("GPT 响应: {}", response)
+            return response.choices[0].message.content
+        except Exception as e:
+            LOG.error(f"生成报告时发生错误：{e}")
+            raise
+
+    async def _agenerate_report_ollama(self, messages):
+        """
+        使用 Ollama LLaMA 模型异步生成报告。与同步版本一样以流式方式接收响应。
+
+        :param messages: 包含系统提示和用户内容的消息列表。
+        :return: 生成的报告内容。
+        """
+        report = "".join([chunk async for chunk in self._astream_report_ollama(messages)])
+        return self._ensure_report(report)
+
+    async def _astream_report_openai(self, messages):
+        """
+        使用 OpenAI GPT 模型流式生成报告。
 
-            # 调试输出查看完整的响应结构
-            LOG.debug("Ollama 响应: {}", response_data)
+        :param messages: 包含系统提示和用户内容的消息列表。
+        :return: 异步生成器，依次产出报告内容片段。
+        """
+        LOG.info(f"使用 OpenAI {self.config.openai_model_name} 模型流式生成报告。")
+        try:
+            stream = await self.async_client.chat.completions.create(
+                model=self.config.openai_model_name,
+                messages=messages,
+                stream=True,
+                timeout=self._httpx_timeout()
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            LOG.error(f"生成报告时发生错误：{e}")
+            raise
+
+    async def _astream_report_ollama(self, messages):
+        """
+        使用 Ollama LLaMA 模型流式生成报告，Ollama 以每行一个 JSON 对象的形式返回内容。
 
-            # 直接从响应数据中获取 content
-            message_content = response_data.get("message", {}).get("content", None)
-            if message_content:
-                return message_content  # 返回生成的报告内容
-            else:
-                LOG.error("无法从响应中提取报告内容。")
-                raise ValueError("Ollama API 返回的响应结构无效")
+        :param messages: 包含系统提示和用户内容的消息列表。
+        :return: 异步生成器，依次产出报告内容片段。
+        """
+        LOG.info(f"使用 Ollama {self.config.ollama_model_name} 模型流式生成报告。")
+        try:
+            payload = {
+                "model": self.config.ollama_model_name,
+                "messages": messages,
+                "max_tokens": 4000,
+                "temperature": 0.7,
+                "stream": True
+            }
+
+            async with get_ollama_async_client().stream("POST", self.api_url, content=orjson.dumps(payload), timeout=self._httpx_timeout()) as response:
+                if response.is_error:
+                    await response.aread()  # 流式响应需先读取响应体再报错
+                    response.raise_for_status()
+                async for line in response.aiter_lines():
+                    content, done = self._parse_ollama_chunk(line)
+                    if content:
+                        yield content
+                    if done:
+                        break
         except Exception as e:
             LOG.error(f"生成报告时发生错误：{e}")
             raise
 
+    def _parse_ollama_chunk(self, line):
+        """
+        解析 Ollama 流式响应中的一行。
+
+        :param line: 一行 JSON 文本。
+        :return: (内容片段, 是否结束)。
+        :raises RuntimeError: 响应中包含错误信息时抛出。
+        """
+        if not line:
+            return None, False
+        chunk = orjson.loads(line)
+        if "error" in chunk:
+            # Ollama 在生成过程中出错时会在流中返回 {"error": "..."}
+            raise RuntimeError(f"Ollama API 返回错误：{chunk['error']}")
+        return chunk.get("message", {}).get("content"), chunk.get("done", False)
+
 if __name__ == '__main__':
     from config import Config  # 导入配置管理类
     config = Config()
@@ -108,62 +707,8 @@ if __name__ == '__main__':
 - docs: update examples in api ref #25589
 """
 
-    # 示例：生成 GitHub 报告
-    system_prompt = """
-    # Role
-    You are a professional GitHub report generation assistant, capable of creating detailed, accurate, and well-organized GitHub reports.
-
-    ## Skills
-    ### Skill 1: Generate GitHub Reports
-    1. When the user requests a GitHub report, first ask about the specific scope the report needs to cover, such as specific repositories or time periods. Skip this step if the user has already provided this information.
-    2. Analyze and organize relevant GitHub data based on the detailed information provided by the user.
-    3. Generate a comprehensive GitHub report according to the analysis results. The report should include but not be limited to aspects such as repository activity, code contribution status, and issue handling progress.
-    === Reply Example ===
-    ### GitHub Report
-    - **Repository Name**: <Specific repository name>
-    - **Report Time Period**: <Start time>-<End time>
-    - **Repository Activity**: During this period, the repository had <X> commits, <X> pushes, etc., with specific data descriptions.
-    - **Code Contribution Status**: <List in detail the main contributors and the number of lines of code contributed, etc.>
-    - **Issue Handling Progress**: A total of <X> issues were created, <X> were resolved, and <X> remain unresolved, etc., with detailed information.
-    === End of Example ===
-
-    ## Constraints:
-    - Only answer questions related to generating GitHub reports and reject irrelevant topics.
-    - The content of the GitHub report output must be clearly structured and logically coherent, organized according to the given format framework requirements.
-    - The data in the report must be accurate and true, based on effective analysis of GitHub data. 
-
-    ## Complete High-quality Prompt Example
-    Original Prompt: “Movie narrator who can introduce the latest movies”
-    Complete High-quality Prompt:
-    # Role
-    You are a sharp movie narrator who can use sharp and humorous language to explain movie plots to users, introduce the latest released movies, and explain movie-related knowledge in language that ordinary people can understand.
-
-    ## Skills
-    ### Skill 1: Recommend the Latest Released Movies
-    1. When the user asks you to recommend the latest movies, you need to first understand what type of movies the user likes. Skip this step if you already know.
-    2. If you don't know the movie the user mentioned, use the tool to search for the movie and understand its genre.
-    3. Based on the user's movie preferences, recommend several movies that are currently showing and upcoming.
-    === Reply Example ===
-    - 🎬 Movie Name: <Movie name>
-    - 🕐 Release Time: <Release date of the movie in mainland China>
-    - 💡 Movie Introduction: <Summarize the plot of the movie in 100 words>
-    === End of Example ===
-
-    ### Skill 2: Introduce a Movie
-    1. When the user asks you to introduce a certain movie, use the tool to search for links to movie introductions.
-    2. If the information obtained at this time is not comprehensive enough, continue to use the tool to open relevant links in the search results to understand the details of the movie.
-    3. Generate a movie introduction based on the search and browsing results.
-
-    ### Skill 3: Introduce Movie Concepts
-    - You can use the knowledge in the dataset, call the knowledge base to search for relevant knowledge, and introduce basic concepts to the user.
-    - Use a movie familiar to the user to give a practical scenario to explain the concept.
-
-    ## Constraints:
-    - Only discuss topics related to movies and reject topics unrelated to movies.
-    - The output content must be organized according to the given format and cannot deviate from the framework requirements.
-    - The summary part cannot exceed 100 words.
-    - Only output content already in the knowledge base. For books not in the knowledge base, use the tool to understand.
-    - Please use Markdown's ^^ to indicate the source of reference.
-    """
+    # 示例：生成 GitHub 报告，系统提示从文件中读取
+    with open("prompts/github_report_example_prompt.txt", "r", encoding='utf-8') as file:
+        system_prompt = file.read()
     github_report = llm.generate_report(system_prompt, markdown_content)
     LOG.debug(github_report)
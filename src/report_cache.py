@@ -0,0 +1,118 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+from logger import LOG  # 导入日志模块
+
+# 清理过期缓存文件的最小间隔，单位：秒
+PRUNE_INTERVAL = 3600
+
+class ReportCache:
+    def __init__(self, cache_dir, ttl):
+        """
+        初始化报告缓存，按内容哈希将 LLM 生成的报告保存到磁盘。
+
+        :param cache_dir: 缓存文件所在目录。
+        :param ttl: 缓存有效期，单位：秒。小于等于 0 时不启用缓存。
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.last_prune = None  # 上次清理过期缓存的时间，首次写入时清理
+
+    def make_key(self, system_prompt, user_content, model_name):
+        """
+        根据系统提示、用户内容和模型名称计算缓存键。
+        """
+        digest = hashlib.blake2b(digest_size=32)
+        for part in (system_prompt, user_content, model_name):
+            digest.update(part.encode('utf-8'))
+            digest.update(b"\0")  # 分隔各部分，避免拼接后产生相同的内容
+        return digest.hexdigest()
+
+    def get(self, key):
+        """
+        读取缓存的报告，未命中或已过期时返回 None。
+        """
+        if self.ttl <= 0:
+            return None
+
+        cache_file = self._cache_file(key)
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as file:
+                entry = json.load(file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            LOG.warning(f"读取报告缓存失败：{e}")
+            return None
+
+        if time.time() - entry.get("created_at", 0) > self.ttl:
+            LOG.debug(f"报告缓存已过期: {cache_file}")
+            self._remove(cache_file)
+            return None
+
+        report = entry.get("report")
+        if not report:
+            return None  # 空报告视为未命中
+
+        LOG.info(f"命中报告缓存: {cache_file}")
+        return report
+
+    def set(self, key, report):
+        """
+        保存报告到缓存。先写入临时文件再替换，避免并发读取到不完整的内容。
+        """
+        if self.ttl <= 0 or not report:
+            return
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # 守护进程的输入几乎每次都不同，过期条目不会再被读取，定期清理以免缓存目录无限增长
+        if self.last_prune is None or time.monotonic() - self.last_prune > PRUNE_INTERVAL:
+            self.prune()
+        cache_file = self._cache_file(key)
+        tmp_file = None
+        try:
+            # 每次写入使用独立的临时文件，多个线程同时写入同一个键时不会互相干扰
+            fd, tmp_file = tempfile.mkstemp(dir=self.cache_dir, prefix=f"{key}.", suffix=".tmp")
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                json.dump({"created_at": time.time(), "report": report}, file, ensure_ascii=False)
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            LOG.warning(f"写入报告缓存失败：{e}")
+            if tmp_file and os.path.exists(tmp_file):
+                os.remove(tmp_file)
+
+    def prune(self):
+        """
+        删除缓存目录中已过期的报告，以及写入中断后残留的临时文件。
+        """
+        self.last_prune = time.monotonic()
+        now = time.time()
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        removed = 0
+        for name in names:
+            if not name.endswith((".json", ".tmp")):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                expired = now - os.path.getmtime(path) > self.ttl
+            except OSError:
+                continue  # 文件已被其他进程删除或替换
+            if expired and self._remove(path):
+                removed += 1
+        if removed:
+            LOG.info(f"已清理 {removed} 个过期的报告缓存")
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    def _cache_file(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
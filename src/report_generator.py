@@ -1,10 +1,24 @@
 import os
+import json
+import asyncio  # 导入asyncio库用于流水线并发生成报告
+import tempfile  # 导入tempfile库用于创建不重名的临时文件
+import threading  # 导入threading库用于保护同一进程内多个线程对状态文件的访问
+from contextlib import contextmanager
+
+try:
+    import fcntl  # 用于在 Gradio 和守护进程之间加锁访问批量任务状态文件（Windows 不支持）
+except ImportError:
+    fcntl = None
 from logger import LOG  # 导入日志模块
 
+# 同一进程内读写批量任务状态文件时使用的锁，跨进程由 fcntl 文件锁保护
+batch_state_lock = threading.Lock()
+
 class ReportGenerator:
-    def __init__(self, llm, report_types):
+    def __init__(self, llm, report_types, batch_state_file="batch_jobs.json"):
         self.llm = llm  # 初始化时接受一个LLM实例，用于后续生成报告
         self.report_types = report_types
+        self.batch_state_file = batch_state_file  # 记录已提交但尚未取回结果的批量任务
         self.prompts = {}  # 存储所有预加载的提示信息
         self._preload_prompts()
 
@@ -29,13 +43,203 @@ class ReportGenerator:
 
         system_prompt = self.prompts.get("github")
         report = self.llm.generate_report(system_prompt, markdown_content)
-        
+        report_file_path = self._save_github_report(markdown_file_path, report)
+        return report, report_file_path
+
+    async def agenerate_github_report(self, markdown_file_path):
+        """
+        generate_github_report 的异步版本，便于在事件循环中并发生成多个项目的报告。
+        """
+        with open(markdown_file_path, 'r') as file:
+            markdown_content = file.read()
+
+        system_prompt = self.prompts.get("github")
+        report = await self.llm.agenerate_report(system_prompt, markdown_content)
+        report_file_path = self._save_github_report(markdown_file_path, report)
+        return report, report_file_path
+
+    async def astream_github_report(self, markdown_file_path):
+        """
+        流式生成 GitHub 项目报告。生成过程中产出 (当前已生成的内容, None)，
+        完成并保存后最后产出 (完整报告, 报告文件路径)。
+        """
+        with open(markdown_file_path, 'r') as file:
+            markdown_content = file.read()
+
+        system_prompt = self.prompts.get("github")
+        report = ""
+        async for chunk in self.llm.astream_report(system_prompt, markdown_content):
+            report += chunk
+            yield report, None
+
+        report_file_path = self._save_github_report(markdown_file_path, report)
+        yield report, report_file_path
+
+    async def agenerate_github_reports(self, markdown_file_paths, batch_size=5):
+        """
+        为多个项目生成 GitHub 报告，每 batch_size 个项目合并为一次 LLM 请求。
+        返回与输入顺序一致的 (report, report_file_path) 列表。
+        """
+        markdown_contents = []
+        for markdown_file_path in markdown_file_paths:
+            with open(markdown_file_path, 'r') as file:
+                markdown_contents.append(file.read())
+
+        system_prompt = self.prompts.get("github")
+        reports = await self.llm.generate_reports_marshaled(system_prompt, markdown_contents, batch_size)
+        return [
+            (report, self._save_github_report(markdown_file_path, report))
+            for markdown_file_path, report in zip(markdown_file_paths, reports)
+        ]
+
+    async def agenerate_github_reports_pipeline(self, repos, export_progress, consumers=2, batch_size=5):
+        """
+        以生产者-消费者流水线生成多个项目的报告：生产者调用 export_progress(repo) 导出项目进展并放入队列，
+        消费者从队列取出已导出的项目生成报告。某个项目等待 LLM 时，其他项目的 GitHub 请求可以同时进行。
+        任一生产者或消费者出错时取消其余任务并抛出该错误。
+        返回与 repos 顺序一致的 (report, report_file_path) 列表。
+        """
+        queue = asyncio.Queue()
+        results = {}
+
+        async def produce(repo):
+            # GitHub API 请求是同步阻塞的，放到线程中执行以免阻塞事件循环
+            markdown_file_path = await asyncio.to_thread(export_progress, repo)
+            await queue.put((repo, markdown_file_path))
+
+        async def produce_all():
+            try:
+                await asyncio.gather(*[produce(repo) for repo in repos])
+            finally:
+                for _ in range(consumers):
+                    queue.put_nowait(None)  # 每个消费者收到一个 None 后退出
+
+        async def consume():
+            done = False
+            while not done:
+                item = await queue.get()
+                if item is None:
+                    return
+
+                # 一次取出队列中已就绪的项目（最多 batch_size 个），合并到同一个提示中生成报告
+                batch = [item]
+                while len(batch) < batch_size and not queue.empty():
+                    item = queue.get_nowait()
+                    if item is None:
+                        done = True
+                        break
+                    batch.append(item)
+
+                reports = await self.agenerate_github_reports([path for _, path in batch], batch_size)
+                for (repo, _), result in zip(batch, reports):
+                    results[repo] = result
+
+        tasks = [asyncio.create_task(produce_all())] + [asyncio.create_task(consume()) for _ in range(consumers)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            # 出错或被取消时，其余任务不会自行结束，需要显式取消并等待其退出
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return [results[repo] for repo in repos]
+
+    def submit_github_report_batch(self, markdown_file_paths):
+        """
+        通过 LLM 的批量接口提交多个项目的 GitHub 报告生成任务，并把任务记录到 batch_state_file。
+        :param markdown_file_paths: {repo: markdown_file_path} 字典。
+        :return: 批量任务 ID。
+        """
+        jobs = {}
+        repos = {}
+        for i, (repo, markdown_file_path) in enumerate(markdown_file_paths.items()):
+            with open(markdown_file_path, 'r') as file:
+                jobs[f"github-{i}"] = file.read()
+            repos[f"github-{i}"] = {"repo": repo, "markdown_file_path": markdown_file_path}
+
+        batch_id = self.llm.submit_report_batch(self.prompts.get("github"), jobs)
+
+        with self._locked_batch_state() as batches:
+            batches[batch_id] = repos
+        return batch_id
+
+    def collect_github_report_batches(self):
+        """
+        检查所有未完成的批量任务，保存已完成任务的报告。
+        返回 (repo, report, report_file_path) 列表，只包含本次新完成的报告。
+        """
+        # 查询任务状态需要网络请求，不持有锁，避免阻塞同时提交的新任务
+        batches = self._load_batch_state()
+        results = []
+        finished = []
+        for batch_id, repos in batches.items():
+            try:
+                reports = self.llm.retrieve_report_batch(batch_id)
+            except RuntimeError:
+                finished.append(batch_id)  # 失败或过期的任务不会再完成，不再检查
+                continue
+            except Exception as e:
+                # 网络波动等临时错误不影响其他任务，下次轮询时重试
+                LOG.error(f"检查批量任务 {batch_id} 时发生错误：{e}")
+                continue
+            if reports is None:
+                continue
+
+            for custom_id, job in repos.items():
+                if custom_id in reports:
+                    report = reports[custom_id]
+                    report_file_path = self._save_github_report(job["markdown_file_path"], report)
+                    results.append((job["repo"], report, report_file_path))
+            finished.append(batch_id)
+
+        if finished:
+            # 加锁后重新读取状态文件，只移除已处理的任务，保留期间新提交的任务
+            with self._locked_batch_state() as batches:
+                for batch_id in finished:
+                    batches.pop(batch_id, None)
+        return results
+
+    @contextmanager
+    def _locked_batch_state(self):
+        """
+        加锁读取批量任务状态，with 代码块正常结束后写回文件。
+        Gradio 提交任务和守护进程取回结果可能同时修改状态文件，加锁避免互相覆盖。
+        """
+        with batch_state_lock, open(f"{self.batch_state_file}.lock", 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)  # 关闭文件时自动释放
+            batches = self._load_batch_state()
+            yield batches
+            self._save_batch_state(batches)
+
+    def _load_batch_state(self):
+        if not os.path.exists(self.batch_state_file):
+            return {}
+        with open(self.batch_state_file, 'r') as file:
+            return json.load(file)
+
+    def _save_batch_state(self, batches):
+        # 先写入同目录下的临时文件再替换，避免进程中断时留下不完整的状态文件
+        state_dir = os.path.dirname(os.path.abspath(self.batch_state_file))
+        fd, tmp_file = tempfile.mkstemp(dir=state_dir, prefix=f"{os.path.basename(self.batch_state_file)}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w') as file:
+                json.dump(batches, file, indent=4)
+            os.replace(tmp_file, self.batch_state_file)
+        except BaseException:
+            os.remove(tmp_file)
+            raise
+
+    def _save_github_report(self, markdown_file_path, report):
+        """
+        将 GitHub 项目报告保存为 {original_filename}_report.md，并返回报告文件路径。
+        """
         report_file_path = os.path.splitext(markdown_file_path)[0] + "_report.md"
         with open(report_file_path, 'w+') as report_file:
             report_file.write(report)
 
         LOG.info(f"GitHub 项目报告已保存到 {report_file_path}")
-        return report, report_file_path
+        return report_file_path
 
     def generate_hn_topic_report(self, markdown_file_path):
         """
@@ -46,13 +250,36 @@ class ReportGenerator:
 
         system_prompt = self.prompts.get("hacker_news_hours_topic")
         report = self.llm.generate_report(system_prompt, markdown_content)
-        
+        report_file_path = self._save_hn_topic_report(markdown_file_path, report)
+        return report, report_file_path
+
+    def stream_hn_topic_report(self, markdown_file_path):
+        """
+        流式生成 Hacker News 小时主题的报告。生成过程中产出 (当前已生成的内容, None)，
+        完成并保存后最后产出 (完整报告, 报告文件路径)。
+        """
+        with open(markdown_file_path, 'r') as file:
+            markdown_content = file.read()
+
+        system_prompt = self.prompts.get("hacker_news_hours_topic")
+        report = ""
+        for chunk in self.llm.stream_report(system_prompt, markdown_content):
+            report += chunk
+            yield report, None
+
+        report_file_path = self._save_hn_topic_report(markdown_file_path, report)
+        yield report, report_file_path
+
+    def _save_hn_topic_report(self, markdown_file_path, report):
+        """
+        将 Hacker News 小时主题报告保存为 {original_filename}_topic.md，并返回报告文件路径。
+        """
         report_file_path = os.path.splitext(markdown_file_path)[0] + "_topic.md"
         with open(report_file_path, 'w+') as report_file:
             report_file.write(report)
 
         LOG.info(f"Hacker News 热点主题报告已保存到 {report_file_path}")
-        return report, report_file_path
+        return report_file_path
 
     def generate_hn_daily_report(self, directory_path):
         """
@@ -1,19 +1,25 @@
 import json
+import time
 
 class SubscriptionManager:
-    def __init__(self, subscriptions_file):
+    def __init__(self, subscriptions_file, ttl=30):
         self.subscriptions_file = subscriptions_file
+        self.ttl = ttl  # 订阅列表的缓存有效期，单位：秒
         self.subscriptions = self.load_subscriptions()
     
     def load_subscriptions(self):
         with open(self.subscriptions_file, 'r') as f:
+            self.loaded_at = time.monotonic()
             return json.load(f)
     
     def save_subscriptions(self):
         with open(self.subscriptions_file, 'w') as f:
             json.dump(self.subscriptions, f, indent=4)
     
-    def list_subscriptions(self):
+    def list_subscriptions(self, refresh=False):
+        # 超过有效期或要求刷新时重新读取文件，订阅文件被修改后无需重启即可生效
+        if refresh or time.monotonic() - self.loaded_at > self.ttl:
+            self.subscriptions = self.load_subscriptions()
         return self.subscriptions
     
     def add_subscription(self, repo):
@@ -1,6 +1,7 @@
 import sys
 import os
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch, MagicMock
 
 # 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
@@ -68,6 +69,66 @@ class TestGitHubClient(unittest.TestCase):
         self.assertEqual(pull_requests[0]['number'], 42)  # 检查拉取请求的编号是否正确
         self.assertEqual(pull_requests[0]['title'], "Add new feature")  # 检查拉取请求的标题是否正确
 
+    @patch('github_client.requests.get')
+    def test_fetch_issues_not_modified(self, mock_get):
+        """
+        测试再次请求时是否携带 If-None-Match 头，并在 GitHub 返回 304 时使用缓存的数据。
+        """
+        # 第一次请求返回数据和 ETag
+        first_response = MagicMock()
+        first_response.json.return_value = [{"number": 1, "title": "Fix bug"}]
+        first_response.status_code = 200
+        first_response.headers = {'ETag': '"abc"'}
+
+        # 第二次请求返回 304，表示数据未变化
+        second_response = MagicMock()
+        second_response.status_code = 304
+        mock_get.side_effect = [first_response, second_response]
+
+        self.client.fetch_issues(self.repo)
+        issues = self.client.fetch_issues(self.repo)
+
+        self.assertEqual(issues, [{"number": 1, "title": "Fix bug"}])  # 检查是否返回缓存的数据
+        self.assertEqual(mock_get.call_args.kwargs['headers']['If-None-Match'], '"abc"')  # 检查是否携带 ETag
+        second_response.json.assert_not_called()
+
+    @patch('github_client.requests.get')
+    def test_etag_cache_bounded(self, mock_get):
+        """
+        测试 ETag 缓存超过容量上限后是否淘汰旧的条目。
+        """
+        mock_response = MagicMock()
+        mock_response.json.return_value = []
+        mock_response.status_code = 200
+        mock_response.headers = {'ETag': '"abc"'}
+        mock_get.return_value = mock_response
+
+        for day in range(self.client.etag_cache.maxsize + 10):
+            self.client.fetch_issues(self.repo, since=f"day-{day}")
+
+        self.assertEqual(len(self.client.etag_cache), self.client.etag_cache.maxsize)
+
+    @patch('github_client.requests.get')
+    def test_etag_cache_concurrent(self, mock_get):
+        """
+        测试多个线程同时请求时 ETag 缓存是否保持一致，淘汰条目不会出错。
+        """
+        mock_response = MagicMock()
+        mock_response.json.return_value = []
+        mock_response.status_code = 200
+        mock_response.headers = {'ETag': '"abc"'}
+        mock_get.return_value = mock_response
+
+        def fetch(worker):
+            for day in range(200):
+                self.client.fetch_issues(self.repo, since=f"{worker}-{day}")
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(fetch, range(8)))
+
+        self.assertEqual(len(self.client.etag_cache), self.client.etag_cache.maxsize)
+        self.client.etag_cache.popitem()  # 内部顺序记录损坏时会抛出 KeyError
+
     @patch('github_client.requests.get')
     def test_export_daily_progress(self, mock_get):
         """
@@ -98,5 +159,22 @@ class TestGitHubClient(unittest.TestCase):
         file_path = self.client.export_progress_by_date_range(self.repo, days=7)
         self.assertTrue(file_path.endswith('.md'))  # 检查生成的文件路径是否以 .md 结尾
 
+    @patch('github_client.requests.get')
+    def test_export_progress_single_write(self, mock_get):
+        """
+        测试 export_progress_by_date_range 方法是否将所有内容拼接后一次写入文件。
+        """
+        mock_response = MagicMock()
+        mock_response.json.return_value = [{"number": 1, "title": "Fix bug"}, {"number": 2, "title": "Add feature"}]
+        mock_response.status_code = 200
+        mock_get.return_value = mock_response
+
+        with patch('github_client.open', unittest.mock.mock_open()) as mock_file:
+            self.client.export_progress_by_date_range(self.repo, days=7)
+
+        mock_file().write.assert_called_once()  # 检查只写入了一次
+        content = mock_file().write.call_args.args[0]
+        self.assertIn("- Fix bug #1\n- Add feature #2\n", content)
+
 if __name__ == '__main__':
     unittest.main()
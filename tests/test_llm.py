@@ -1,11 +1,19 @@
 import sys
 import os
+import json
+import asyncio
+import shutil
+import tempfile
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
+import orjson
+import requests
+import httpx
 
 # 将 src 目录添加到模块搜索路径，方便导入项目中的模块
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 
+import llm as llm_module
 from config import Config  # 导入配置类
 from llm import LLM  # 导入要测试的 LLM 类
 
@@ -14,7 +22,9 @@ class TestLLM(unittest.TestCase):
         """
         在每个测试方法运行前执行，初始化 LLM 实例和测试数据。
         """
+        llm_module.openai_clients = None  # 清除共享的 OpenAI 客户端，使每个测试使用各自模拟的客户端
         self.config = Config()  # 初始化配置对象
+        self.config.llm_cache_dir = tempfile.mkdtemp()  # 使用临时的报告缓存目录，避免测试之间互相影响
         self.llm = LLM(self.config)  # 使用配置对象初始化 LLM 实例
 
         # 设置示例的系统提示信息
@@ -30,6 +40,21 @@ class TestLLM(unittest.TestCase):
         - docs: update examples in api ref #25589
         """
 
+    def tearDown(self):
+        """
+        在每个测试方法运行后执行，清理临时的报告缓存目录。
+        """
+        shutil.rmtree(self.config.llm_cache_dir, ignore_errors=True)
+
+    def mock_ollama_stream(self, *chunks):
+        """
+        构造模拟的 Ollama 流式响应，每个 chunk 对应响应中的一行 JSON。
+        """
+        mock_response = MagicMock()
+        mock_response.__enter__.return_value = mock_response
+        mock_response.iter_lines.return_value = [orjson.dumps(chunk) for chunk in chunks]
+        return mock_response
+
     @patch('llm.LOG.error')
     def test_invalid_model_type(self, mock_log_error):
         """
@@ -40,16 +65,14 @@ class TestLLM(unittest.TestCase):
             llm = LLM(self.config)
         mock_log_error.assert_called_with("不支持的模型类型: invalid_model")
 
-    @patch('llm.requests.post')
     @patch('llm.LOG.error')
-    def test_ollama_invalid_response_structure(self, mock_log_error, mock_post):
+    def test_ollama_invalid_response_structure(self, mock_log_error):
         """
         测试 Ollama API 返回的响应结构无效时的错误处理路径。
         """
         # 模拟 Ollama API 的无效响应
-        mock_response = MagicMock()
-        mock_response.json.return_value = {"invalid_key": "no_content_here"}
-        mock_post.return_value = mock_response
+        mock_response = self.mock_ollama_stream({"invalid_key": "no_content_here", "done": True})
+        self.llm.session.post = MagicMock(return_value=mock_response)
 
         with self.assertRaises(ValueError):
             self.llm.generate_report(self.system_prompt, self.github_content)
@@ -57,8 +80,9 @@ class TestLLM(unittest.TestCase):
 
 
     @patch('llm.LOG.error')
-    @patch('llm.OpenAI')
-    def test_openai_exception_handling(self, mock_openai, mock_log_error):
+    @patch('openai.AsyncOpenAI')
+    @patch('openai.OpenAI')
+    def test_openai_exception_handling(self, mock_openai, mock_async_openai, mock_log_error):
         """
         测试调用 OpenAI 模型时发生异常的错误处理路径。
         """
@@ -75,6 +99,359 @@ class TestLLM(unittest.TestCase):
         # 检查是否记录了预期的错误日志
         mock_log_error.assert_called_with("生成报告时发生错误：OpenAI API error")
 
+    @patch('openai.AsyncOpenAI')
+    @patch('openai.OpenAI')
+    def test_generate_reports_batch(self, mock_openai, mock_async_openai):
+        """
+        测试 generate_reports_batch 方法是否并发生成报告，并按输入顺序返回结果。
+        """
+        self.config.llm_model_type = "openai"
+        self.llm = LLM(self.config)
+
+        # 根据用户内容返回不同的模拟响应
+        async def fake_create(model, messages, **kwargs):
+            response = MagicMock()
+            response.choices[0].message.content = f"report for {messages[1]['content']}"
+            return response
+        mock_async_openai().chat.completions.create = AsyncMock(side_effect=fake_create)
+
+        pairs = [(self.system_prompt, "repo-a"), (self.system_prompt, "repo-b")]
+        reports = asyncio.run(self.llm.generate_reports_batch(pairs))
+
+        self.assertEqual(reports, ["report for repo-a", "report for repo-b"])
+        self.assertEqual(mock_async_openai().chat.completions.create.call_count, 2)
+
+    def test_generate_reports_marshaled(self):
+        """
+        测试 generate_reports_marshaled 方法是否将多个内容合并为一次请求，并按分隔标记拆分报告。
+        """
+        self.llm.agenerate_report = AsyncMock(return_value="===REPORT 1===\nreport a\n===REPORT 2===\nreport b\n")
+
+        reports = asyncio.run(self.llm.generate_reports_marshaled(self.system_prompt, ["repo-a", "repo-b"]))
+
+        self.assertEqual(reports, ["report a", "report b"])
+        self.llm.agenerate_report.assert_called_once()
+        marshaled_content = self.llm.agenerate_report.call_args.args[1]
+        self.assertIn("===REPO 1===\nrepo-a", marshaled_content)
+        self.assertIn("===REPO 2===\nrepo-b", marshaled_content)
+
+    def test_generate_reports_marshaled_fallback(self):
+        """
+        测试合并响应缺少部分报告时，是否对缺失的内容单独重新生成。
+        """
+        self.llm.agenerate_report = AsyncMock(side_effect=["===REPORT 1===\nreport a", "report b"])
+
+        reports = asyncio.run(self.llm.generate_reports_marshaled(self.system_prompt, ["repo-a", "repo-b"]))
+
+        self.assertEqual(reports, ["report a", "report b"])
+        self.llm.agenerate_report.assert_called_with(self.system_prompt, "repo-b")
+
+    def test_generate_report_uses_cache(self):
+        """
+        测试相同输入再次生成报告时是否直接使用缓存，不再调用模型。
+        """
+        mock_response = self.mock_ollama_stream({"message": {"content": "cached report"}, "done": True})
+        mock_post = self.llm.session.post = MagicMock(return_value=mock_response)
+
+        first = self.llm.generate_report(self.system_prompt, self.github_content)
+        second = self.llm.generate_report(self.system_prompt, self.github_content)
+
+        self.assertEqual(first, "cached report")
+        self.assertEqual(second, "cached report")
+        mock_post.assert_called_once()
+
+    @patch('openai.AsyncOpenAI')
+    @patch('openai.OpenAI')
+    def test_astream_report_openai(self, mock_openai, mock_async_openai):
+        """
+        测试 astream_report 方法是否逐段产出 OpenAI 的流式响应，并在结束后写入缓存。
+        """
+        self.config.llm_model_type = "openai"
+        self.llm = LLM(self.config)
+
+        # 模拟 OpenAI 的流式响应
+        async def fake_stream():
+            for content in ["Hello", " ", "world"]:
+                chunk = MagicMock()
+                chunk.choices[0].delta.content = content
+                yield chunk
+        mock_async_openai().chat.completions.create = AsyncMock(return_value=fake_stream())
+
+        async def collect():
+            return [chunk async for chunk in self.llm.astream_report(self.system_prompt, self.github_content)]
+
+        self.assertEqual(asyncio.run(collect()), ["Hello", " ", "world"])
+        self.assertEqual(asyncio.run(collect()), ["Hello world"])  # 第二次直接从缓存产出完整报告
+        mock_async_openai().chat.completions.create.assert_called_once()
+
+    @patch('llm.LOG.warning')
+    def test_ollama_retry_on_timeout(self, mock_log_warning):
+        """
+        测试 Ollama 请求超时后是否重试，并在重试成功后返回报告。
+        """
+        mock_response = self.mock_ollama_stream({"message": {"content": "report after retry"}, "done": True})
+        self.llm.session.post = MagicMock(side_effect=[requests.Timeout("timed out"), mock_response])
+
+        report = self.llm.generate_report(self.system_prompt, self.github_content)
+
+        self.assertEqual(report, "report after retry")
+        self.assertEqual(self.llm.session.post.call_count, 2)
+        mock_log_warning.assert_called_once()
+
+    def test_ollama_retry_exhausted(self):
+        """
+        测试重试次数用完后是否抛出超时异常。
+        """
+        self.config.max_retries = 1
+        self.llm.session.post = MagicMock(side_effect=requests.Timeout("timed out"))
+
+        with self.assertRaises(requests.Timeout):
+            self.llm.generate_report(self.system_prompt, self.github_content)
+        self.assertEqual(self.llm.session.post.call_count, 2)
+
+    def test_concurrency_limit(self):
+        """
+        测试同时进行的异步请求数量是否不超过 max_concurrent_llm_calls。
+        """
+        self.config.max_concurrent_llm_calls = 2
+        self.llm = LLM(self.config)
+
+        in_flight = 0
+        max_in_flight = 0
+
+        # 模拟耗时的 Ollama 请求，并记录最大并发数
+        async def fake_generate(messages):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return messages[1]["content"]
+        self.llm._agenerate_report_ollama = fake_generate
+
+        pairs = [(self.system_prompt, f"repo-{i}") for i in range(6)]
+        reports = asyncio.run(self.llm.generate_reports_batch(pairs))
+
+        self.assertEqual(reports, [f"repo-{i}" for i in range(6)])
+        self.assertEqual(max_in_flight, 2)
+
+    @patch('openai.AsyncOpenAI')
+    @patch('openai.OpenAI')
+    def test_report_batch(self, mock_openai, mock_async_openai):
+        """
+        测试 submit_report_batch 是否上传 JSONL 并创建批量任务，retrieve_report_batch 是否正确解析结果。
+        """
+        self.config.llm_model_type = "openai"
+        self.llm = LLM(self.config)
+        client = mock_openai()
+        client.files.create.return_value.id = "file-input"
+        client.batches.create.return_value.id = "batch-1"
+
+        batch_id = self.llm.submit_report_batch(self.system_prompt, {"github-0": self.github_content})
+
+        self.assertEqual(batch_id, "batch-1")
+        _, content = client.files.create.call_args.kwargs['file']
+        request = json.loads(content.decode("utf-8"))
+        self.assertEqual(request["custom_id"], "github-0")
+        self.assertEqual(request["body"]["messages"][1]["content"], self.github_content)
+        client.batches.create.assert_called_once_with(
+            input_file_id="file-input", endpoint="/v1/chat/completions", completion_window="24h"
+        )
+
+        # 任务未完成时返回 None
+        client.batches.retrieve.return_value.status = "in_progress"
+        self.assertIsNone(self.llm.retrieve_report_batch(batch_id))
+
+        # 任务完成后解析输出文件
+        client.batches.retrieve.return_value.status = "completed"
+        client.batches.retrieve.return_value.error_file_id = None
+        client.files.content.return_value.text = json.dumps({
+            "custom_id": "github-0",
+            "response": {"status_code": 200, "body": {"choices": [{"message": {"content": "batch report"}}]}},
+            "error": None,
+        })
+        self.assertEqual(self.llm.retrieve_report_batch(batch_id), {"github-0": "batch report"})
+
+        # 所有请求都失败时没有输出文件，只读取错误文件
+        client.files.content.reset_mock()
+        client.batches.retrieve.return_value.output_file_id = None
+        client.batches.retrieve.return_value.error_file_id = "file-error"
+        self.assertEqual(self.llm.retrieve_report_batch(batch_id), {})
+        client.files.content.assert_called_once_with("file-error")
+
+    def test_report_batch_requires_openai(self):
+        """
+        测试非 OpenAI 模型提交批量任务时抛出错误。
+        """
+        with self.assertRaises(ValueError):
+            self.llm.submit_report_batch(self.system_prompt, {"github-0": self.github_content})
+
+    @patch('llm.get_token_encoding')
+    @patch('llm.count_tokens', side_effect=lambda text, model_name: len(text))
+    @patch('openai.AsyncOpenAI')
+    @patch('openai.OpenAI')
+    def test_prompt_too_long(self, mock_openai, mock_async_openai, mock_count_tokens, mock_get_token_encoding):
+        """
+        测试提示超过 max_prompt_tokens 时是否在发送请求前直接报错。
+        """
+        self.config.llm_model_type = "openai"
+        self.config.max_prompt_tokens = 10
+        self.llm = LLM(self.config)
+
+        with self.assertRaises(ValueError):
+            self.llm.generate_report(self.system_prompt, self.github_content)
+        mock_openai().chat.completions.create.assert_not_called()
+
+    @patch('openai.AsyncOpenAI')
+    @patch('openai.OpenAI')
+    def test_prompt_with_special_tokens(self, mock_openai, mock_async_openai):
+        """
+        测试项目内容中包含 <|endoftext|> 等特殊 token 字符串时，提示长度检查不会报错。
+        """
+        import tiktoken
+
+        # 构造一个离线可用的字节级编码，包含与 OpenAI 编码相同的特殊 token
+        encoding = tiktoken.Encoding(
+            name="test_bytes",
+            pat_str=r"\S+|\s+",
+            mergeable_ranks={bytes([i]): i for i in range(256)},
+            special_tokens={"<|endoftext|>": 256},
+        )
+        count_tokens = llm_module.count_tokens
+        count_tokens.cache_clear()
+        self.addCleanup(count_tokens.cache_clear)
+
+        self.config.llm_model_type = "openai"
+        with patch('llm.get_token_encoding', return_value=encoding):
+            self.llm = LLM(self.config)
+            mock_openai().chat.completions.create.return_value.choices[0].message.content = "report"
+
+            user_content = "- tokenizer: handle <|endoftext|> in prompts #123"
+            self.assertEqual(self.llm.generate_report(self.system_prompt, user_content), "report")
+        mock_openai().chat.completions.create.assert_called_once()
+
+    def test_max_prompt_tokens_per_model(self):
+        """
+        测试未配置 max_prompt_tokens 时是否按模型的上下文窗口确定提示上限。
+        """
+        self.assertEqual(llm_module.get_max_prompt_tokens("gpt-4o-mini"), 128000)
+        self.assertEqual(llm_module.get_max_prompt_tokens("gpt-4o-2024-08-06"), 128000)
+        self.assertEqual(llm_module.get_max_prompt_tokens("gpt-3.5-turbo-0125"), 16385)
+        self.assertEqual(llm_module.get_max_prompt_tokens("gpt-4-0613"), 8192)
+        self.assertIsNone(llm_module.get_max_prompt_tokens("unknown-model"))
+
+    @patch('tiktoken.encoding_for_model', side_effect=OSError("network unreachable"))
+    def test_token_encoding_failure_cached(self, mock_encoding_for_model):
+        """
+        测试 tiktoken 编码加载失败时是否只尝试一次，之后跳过提示长度检查。
+        """
+        llm_module.get_token_encoding.cache_clear()
+        self.addCleanup(llm_module.get_token_encoding.cache_clear)
+
+        self.assertIsNone(llm_module.get_token_encoding("gpt-4o-mini"))
+        self.assertIsNone(llm_module.get_token_encoding("gpt-4o-mini"))
+        mock_encoding_for_model.assert_called_once()
+
+    @patch('openai.AsyncOpenAI')
+    @patch('openai.OpenAI')
+    def test_openai_clients_shared(self, mock_openai, mock_async_openai):
+        """
+        测试多个 LLM 实例是否共享同一组 OpenAI 客户端，不重复创建连接池。
+        """
+        self.config.llm_model_type = "openai"
+        first = LLM(self.config)
+        second = LLM(self.config)
+
+        self.assertIs(first.client, second.client)
+        self.assertIs(first.async_client, second.async_client)
+        mock_openai.assert_called_once()
+        mock_async_openai.assert_called_once()
+
+    def test_stream_report_ollama(self):
+        """
+        测试 stream_report 方法是否逐行解析 Ollama 的流式响应，并在 done 后停止读取。
+        """
+        mock_response = self.mock_ollama_stream(
+            {"message": {"content": "Hello"}, "done": False},
+            {"message": {"content": " world"}, "done": False},
+            {"message": {"content": ""}, "done": True},
+            {"message": {"content": "ignored"}, "done": False},
+        )
+        self.llm.session.post = MagicMock(return_value=mock_response)
+
+        chunks = list(self.llm.stream_report(self.system_prompt, self.github_content))
+
+        self.assertEqual(chunks, ["Hello", " world"])
+        payload = orjson.loads(self.llm.session.post.call_args.kwargs['data'])
+        self.assertTrue(payload["stream"])  # 检查请求是否启用了流式响应
+        self.assertTrue(self.llm.session.post.call_args.kwargs['stream'])
+
+    def test_stream_report_empty_not_cached(self):
+        """
+        测试流式响应没有任何内容时是否报错，且不会把空报告写入缓存。
+        """
+        self.llm.session.post = MagicMock(return_value=self.mock_ollama_stream({"done": True}))
+
+        with self.assertRaises(ValueError):
+            list(self.llm.stream_report(self.system_prompt, self.github_content))
+
+        # 再次生成时不应从缓存返回空报告，而是重新请求并报错
+        self.llm.session.post = MagicMock(return_value=self.mock_ollama_stream({"done": True}))
+        with self.assertRaises(ValueError):
+            self.llm.generate_report(self.system_prompt, self.github_content)
+        self.llm.session.post.assert_called_once()
+        self.assertEqual(os.listdir(self.config.llm_cache_dir), [])
+
+    def test_ollama_http_error(self):
+        """
+        测试 Ollama API 返回非 2xx 状态码时是否直接报错，且不重试。
+        """
+        mock_response = self.mock_ollama_stream()
+        mock_response.raise_for_status.side_effect = requests.HTTPError("404 Client Error: Not Found")
+        self.llm.session.post = MagicMock(return_value=mock_response)
+
+        with self.assertRaises(requests.HTTPError):
+            self.llm.generate_report(self.system_prompt, self.github_content)
+        self.llm.session.post.assert_called_once()
+
+    def test_ollama_error_chunk(self):
+        """
+        测试 Ollama 流式响应中包含 error 字段时是否抛出错误信息。
+        """
+        mock_response = self.mock_ollama_stream(
+            {"message": {"content": "Hello"}, "done": False},
+            {"error": "model runner has unexpectedly stopped"},
+        )
+        self.llm.session.post = MagicMock(return_value=mock_response)
+
+        with self.assertRaisesRegex(RuntimeError, "model runner has unexpectedly stopped"):
+            list(self.llm.stream_report(self.system_prompt, self.github_content))
+        self.assertEqual(os.listdir(self.config.llm_cache_dir), [])
+
+    def test_aollama_http_error(self):
+        """
+        测试异步请求 Ollama API 返回非 2xx 状态码时是否直接报错。
+        """
+        transport = httpx.MockTransport(lambda request: httpx.Response(404, json={"error": "model not found"}))
+
+        async def run():
+            async with httpx.AsyncClient(transport=transport) as client:
+                with patch.object(llm_module, 'ollama_async_client', client):
+                    await self.llm.agenerate_report(self.system_prompt, self.github_content)
+
+        with self.assertRaises(httpx.HTTPStatusError):
+            asyncio.run(run())
+
+    def test_ollama_async_client_lazy(self):
+        """
+        测试 Ollama 异步客户端是否在首次使用时才创建，之后复用同一个客户端。
+        """
+        with patch.object(llm_module, 'ollama_async_client', None):
+            client = llm_module.get_ollama_async_client()
+            self.assertIsInstance(client, httpx.AsyncClient)
+            self.assertIs(llm_module.get_ollama_async_client(), client)
+            asyncio.run(client.aclose())
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,91 @@
+import sys
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from report_cache import ReportCache  # 导入要测试的 ReportCache 类
+
+class TestReportCache(unittest.TestCase):
+    def setUp(self):
+        """
+        在每个测试方法之前运行，创建临时缓存目录。
+        """
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache = ReportCache(self.cache_dir, ttl=3600)
+        self.key = self.cache.make_key("system prompt", "user content", "openai:gpt-4o-mini")
+
+    def tearDown(self):
+        """
+        在每个测试方法之后运行，删除临时缓存目录。
+        """
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_set_and_get(self):
+        """
+        测试保存的报告是否可以按相同的键读取。
+        """
+        self.assertIsNone(self.cache.get(self.key))  # 未保存前不应命中
+        self.cache.set(self.key, "report")
+        self.assertEqual(self.cache.get(self.key), "report")
+
+    def test_make_key_depends_on_model(self):
+        """
+        测试不同模型对相同内容计算出不同的缓存键。
+        """
+        other_key = self.cache.make_key("system prompt", "user content", "ollama:llama3.1")
+        self.assertNotEqual(self.key, other_key)
+
+    def test_expired_entry(self):
+        """
+        测试超过有效期的缓存不再命中。
+        """
+        self.cache.set(self.key, "report")
+
+        # 将缓存的创建时间改为很久以前
+        cache_file = os.path.join(self.cache_dir, f"{self.key}.json")
+        with open(cache_file, 'w', encoding='utf-8') as file:
+            json.dump({"created_at": 0, "report": "report"}, file)
+
+        self.assertIsNone(self.cache.get(self.key))
+        self.assertFalse(os.path.exists(cache_file))  # 过期的缓存文件被删除
+
+    def test_prune(self):
+        """
+        测试写入缓存时是否清理过期的缓存文件和残留的临时文件，并保留有效的缓存。
+        """
+        old_file = os.path.join(self.cache_dir, "old.json")
+        stale_tmp = os.path.join(self.cache_dir, "old.json.abc.tmp")
+        for path in (old_file, stale_tmp):
+            with open(path, 'w', encoding='utf-8') as file:
+                json.dump({"created_at": 0, "report": "old report"}, file)
+            os.utime(path, (0, 0))  # 将修改时间改为很久以前
+
+        self.cache.set(self.key, "report")
+
+        self.assertEqual(os.listdir(self.cache_dir), [f"{self.key}.json"])
+        self.assertEqual(self.cache.get(self.key), "report")
+
+    def test_empty_report_not_cached(self):
+        """
+        测试空报告不会写入缓存。
+        """
+        self.cache.set(self.key, "")
+        self.assertIsNone(self.cache.get(self.key))
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_disabled_cache(self):
+        """
+        测试 ttl 为 0 时不写入也不读取缓存。
+        """
+        cache = ReportCache(self.cache_dir, ttl=0)
+        cache.set(self.key, "report")
+        self.assertIsNone(cache.get(self.key))
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 import sys
 import os
+import asyncio
 import unittest
 from unittest.mock import MagicMock, patch
 
@@ -107,6 +108,187 @@ class TestReportGenerator(unittest.TestCase):
         # 验证 LLM 的 generate_report 方法是否被正确调用，且传入了正确的参数
         self.mock_llm.generate_report.assert_called_once_with(self.mock_prompts["github"], self.markdown_content)
 
+    @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
+    def test_astream_github_report(self, mock_preload_prompts):
+        """
+        测试 astream_github_report 方法是否逐步产出报告内容，并在最后保存报告文件。
+        """
+        self.report_generator = ReportGenerator(self.mock_llm, ["github", "hacker_news_hours_topic", "hacker_news_daily_report"])
+        self.report_generator.prompts = self.mock_prompts
+
+        # 模拟 LLM 的流式输出
+        async def fake_stream(system_prompt, user_content):
+            for chunk in ["This is ", "a streamed report."]:
+                yield chunk
+        self.mock_llm.astream_report = fake_stream
+
+        async def collect():
+            return [item async for item in self.report_generator.astream_github_report(self.test_markdown_file_path)]
+
+        results = asyncio.run(collect())
+
+        # 验证中间结果逐步累积，且只有最后一项包含报告文件路径
+        self.assertEqual(results[:-1], [("This is ", None), ("This is a streamed report.", None)])
+        report, report_file_path = results[-1]
+        self.assertEqual(report, "This is a streamed report.")
+        with open(report_file_path, 'r') as file:
+            self.assertEqual(file.read(), report)
+
+    @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
+    def test_github_reports_pipeline_order(self, mock_preload_prompts):
+        """
+        测试流水线生成的报告是否按 repos 的顺序返回，且多个消费者都能正常退出。
+        """
+        self.report_generator = ReportGenerator(self.mock_llm, ["github"])
+        repos = [f"owner/repo{i}" for i in range(7)]
+
+        async def fake_agenerate_github_reports(markdown_file_paths, batch_size):
+            # 让靠前的项目更晚完成，验证结果顺序不依赖完成顺序
+            await asyncio.sleep(0.01 * (7 - len(markdown_file_paths)))
+            return [(f"report for {path}", path) for path in markdown_file_paths]
+
+        self.report_generator.agenerate_github_reports = MagicMock(side_effect=fake_agenerate_github_reports)
+        export_progress = MagicMock(side_effect=lambda repo: f"{repo}.md")
+
+        results = asyncio.run(asyncio.wait_for(
+            self.report_generator.agenerate_github_reports_pipeline(repos, export_progress, consumers=3, batch_size=2),
+            timeout=5,
+        ))
+
+        self.assertEqual(results, [(f"report for {repo}.md", f"{repo}.md") for repo in repos])
+        self.assertEqual(export_progress.call_count, len(repos))
+        for call in self.report_generator.agenerate_github_reports.call_args_list:
+            self.assertLessEqual(len(call.args[0]), 2)  # 每次最多合并 batch_size 个项目
+
+    @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
+    def test_github_reports_pipeline_empty(self, mock_preload_prompts):
+        """
+        测试没有项目时流水线的多个消费者是否收到结束标记并立即退出。
+        """
+        self.report_generator = ReportGenerator(self.mock_llm, ["github"])
+        self.report_generator.agenerate_github_reports = MagicMock()
+
+        results = asyncio.run(asyncio.wait_for(
+            self.report_generator.agenerate_github_reports_pipeline([], MagicMock(), consumers=3),
+            timeout=5,
+        ))
+
+        self.assertEqual(results, [])
+        self.report_generator.agenerate_github_reports.assert_not_called()
+
+    @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
+    def test_github_reports_pipeline_error(self, mock_preload_prompts):
+        """
+        测试某个消费者出错时流水线是否抛出该错误，并取消仍在生成报告的其他消费者。
+        """
+        self.report_generator = ReportGenerator(self.mock_llm, ["github"])
+        cancelled = []
+        slow_started = asyncio.Event()
+
+        async def fake_agenerate_github_reports(markdown_file_paths, batch_size):
+            if markdown_file_paths == ["owner/bad.md"]:
+                await slow_started.wait()  # 确保另一个消费者已开始生成报告
+                raise ValueError("LLM failed")
+            slow_started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.extend(markdown_file_paths)
+                raise
+
+        self.report_generator.agenerate_github_reports = MagicMock(side_effect=fake_agenerate_github_reports)
+
+        async def run():
+            return await self.report_generator.agenerate_github_reports_pipeline(
+                ["owner/slow", "owner/bad"], lambda repo: f"{repo}.md", consumers=2, batch_size=1
+            )
+
+        with self.assertRaisesRegex(ValueError, "LLM failed"):
+            asyncio.run(asyncio.wait_for(run(), timeout=5))
+        self.assertEqual(cancelled, ["owner/slow.md"])
+
+    @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
+    def test_github_reports_pipeline_export_error(self, mock_preload_prompts):
+        """
+        测试导出项目进展出错时流水线是否抛出该错误，且消费者不会一直等待。
+        """
+        self.report_generator = ReportGenerator(self.mock_llm, ["github"])
+        self.report_generator.agenerate_github_reports = MagicMock()
+
+        def export_progress(repo):
+            raise RuntimeError(f"export failed: {repo}")
+
+        with self.assertRaisesRegex(RuntimeError, "export failed"):
+            asyncio.run(asyncio.wait_for(
+                self.report_generator.agenerate_github_reports_pipeline(["owner/repo"], export_progress, consumers=2),
+                timeout=5,
+            ))
+        self.report_generator.agenerate_github_reports.assert_not_called()
+
+    @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
+    def test_github_report_batch(self, mock_preload_prompts):
+        """
+        测试批量任务提交后是否记录到状态文件，完成后是否保存报告并清除记录。
+        """
+        batch_state_file = 'test_batch_jobs.json'
+        for path in (batch_state_file, f"{batch_state_file}.lock"):
+            self.addCleanup(lambda path=path: os.path.exists(path) and os.remove(path))
+        self.report_generator = ReportGenerator(self.mock_llm, ["github"], batch_state_file)
+        self.report_generator.prompts = self.mock_prompts
+
+        self.mock_llm.submit_report_batch.return_value = "batch-1"
+        batch_id = self.report_generator.submit_github_report_batch({"some/repo": self.test_markdown_file_path})
+
+        self.assertEqual(batch_id, "batch-1")
+        self.mock_llm.submit_report_batch.assert_called_once_with(self.mock_prompts["github"], {"github-0": self.markdown_content})
+
+        # 任务未完成时不返回报告，记录保留
+        self.mock_llm.retrieve_report_batch.return_value = None
+        self.assertEqual(self.report_generator.collect_github_report_batches(), [])
+
+        # 临时错误不会中断检查，记录保留到下次轮询
+        self.mock_llm.retrieve_report_batch.side_effect = ConnectionError("connection reset")
+        self.assertEqual(self.report_generator.collect_github_report_batches(), [])
+        self.mock_llm.retrieve_report_batch.side_effect = None
+
+        # 任务完成后保存报告并清除记录
+        self.mock_llm.retrieve_report_batch.return_value = {"github-0": "This is a batch report."}
+        results = self.report_generator.collect_github_report_batches()
+
+        self.assertEqual(len(results), 1)
+        repo, report, report_file_path = results[0]
+        self.assertEqual((repo, report), ("some/repo", "This is a batch report."))
+        with open(report_file_path, 'r') as file:
+            self.assertEqual(file.read(), report)
+        self.assertEqual(self.report_generator.collect_github_report_batches(), [])
+
+    @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
+    def test_github_report_batch_concurrent_submit(self, mock_preload_prompts):
+        """
+        测试取回批量任务期间新提交的任务不会被覆盖丢失。
+        """
+        batch_state_file = 'test_batch_jobs.json'
+        for path in (batch_state_file, f"{batch_state_file}.lock"):
+            self.addCleanup(lambda path=path: os.path.exists(path) and os.remove(path))
+        self.report_generator = ReportGenerator(self.mock_llm, ["github"], batch_state_file)
+        self.report_generator.prompts = self.mock_prompts
+
+        self.mock_llm.submit_report_batch.return_value = "batch-1"
+        self.report_generator.submit_github_report_batch({"some/repo": self.test_markdown_file_path})
+
+        def retrieve(batch_id):
+            # 模拟 Gradio 在守护进程查询任务状态期间提交新任务
+            self.mock_llm.submit_report_batch.return_value = "batch-2"
+            self.report_generator.submit_github_report_batch({"other/repo": self.test_markdown_file_path})
+            return {"github-0": "This is a batch report."}
+
+        self.mock_llm.retrieve_report_batch.side_effect = retrieve
+        results = self.report_generator.collect_github_report_batches()
+
+        self.assertEqual([repo for repo, _, _ in results], ["some/repo"])
+        self.assertEqual(list(self.report_generator._load_batch_state()), ["batch-2"])
+        self.assertEqual([name for name in os.listdir('.') if name.endswith('.tmp')], [])
+
     @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
     def test_generate_hn_topic_report(self, mock_preload_prompts):
         """
@@ -135,6 +317,26 @@ class TestReportGenerator(unittest.TestCase):
         # 验证 LLM 的 generate_report 方法是否被正确调用，且传入了正确的参数
         self.mock_llm.generate_report.assert_called_once_with(self.mock_prompts["hacker_news_hours_topic"], self.markdown_content)
 
+    @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
+    def test_stream_hn_topic_report(self, mock_preload_prompts):
+        """
+        测试 stream_hn_topic_report 方法是否逐步产出报告内容，并在最后保存报告文件。
+        """
+        self.report_generator = ReportGenerator(self.mock_llm, ["github", "hacker_news_hours_topic", "hacker_news_daily_report"])
+        self.report_generator.prompts = self.mock_prompts
+
+        # 模拟 LLM 的流式输出
+        self.mock_llm.stream_report.return_value = iter(["Hacker News ", "topic report."])
+
+        results = list(self.report_generator.stream_hn_topic_report(self.test_hn_topic_file_path))
+
+        self.assertEqual(results[:-1], [("Hacker News ", None), ("Hacker News topic report.", None)])
+        report, report_file_path = results[-1]
+        self.assertTrue(report_file_path.endswith("_topic.md"))
+        with open(report_file_path, 'r') as file:
+            self.assertEqual(file.read(), report)
+        self.mock_llm.stream_report.assert_called_once_with(self.mock_prompts["hacker_news_hours_topic"], self.markdown_content)
+
     @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
     def test_generate_hn_daily_report(self, mock_preload_prompts):
         """
@@ -62,6 +62,29 @@ class TestSubscriptionManager(unittest.TestCase):
         # 验证 open 函数是否正确调用以读取文件
         mock_file.assert_called_once_with(self.subscriptions_file, 'r')
 
+    @patch('subscription_manager.time.monotonic')
+    @patch('builtins.open', new_callable=mock_open, read_data=json.dumps(["DjangoPeng/openai-quickstart"]))
+    def test_list_subscriptions_reload(self, mock_file, mock_monotonic):
+        """
+        测试 list_subscriptions 方法在缓存有效期内不重复读取文件，过期或要求刷新时重新读取。
+        """
+        mock_monotonic.return_value = 0
+        manager = SubscriptionManager(self.subscriptions_file, ttl=30)
+
+        # 有效期内直接返回内存中的订阅列表
+        mock_monotonic.return_value = 10
+        manager.list_subscriptions()
+        self.assertEqual(mock_file.call_count, 1)
+
+        # 要求刷新时重新读取文件
+        manager.list_subscriptions(refresh=True)
+        self.assertEqual(mock_file.call_count, 2)
+
+        # 超过有效期后重新读取文件
+        mock_monotonic.return_value = 100
+        manager.list_subscriptions()
+        self.assertEqual(mock_file.call_count, 3)
+
     @patch('builtins.open', new_callable=mock_open, read_data=json.dumps(["DjangoPeng/openai-quickstart"]))
     def test_add_subscription(self, mock_file):
         """